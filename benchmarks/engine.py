@@ -0,0 +1,145 @@
+"""
+Engine benchmarks: planning throughput, per-keystroke overhead and peak memory
+for every preset, on texts from 1 KB up to 10 MB. Runs against a null sink and
+a virtual clock (see typesim.dryrun), so nothing is typed and nothing sleeps.
+Also runs the startup check from startup.py.
+
+    python benchmarks/engine.py                  # measure and compare with the stored baselines
+    python benchmarks/engine.py --sizes 1k,10m   # pick text sizes (1k, 100k, 1m, 10m)
+    python benchmarks/engine.py --update         # store the current numbers as the new baseline
+
+Exits with status 1 if anything regressed past the tolerance or has no
+baseline to compare with. Baselines are machine-specific and not committed:
+run with --update once on the machine you compare on.
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import startup  # noqa: E402  (benchmarks/startup.py)
+from typesim import config, config_manager, dryrun, randomness, typing_engine  # noqa: E402
+
+BASELINE_FILE = Path(__file__).resolve().parent / "baselines" / "engine.json"
+SAMPLE_FILE = ROOT / "text.txt"
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+DEFAULT_SIZES = "1k,100k,1m"
+
+# tracemalloc slows a dry run ~10x, so bigger texts skip the memory pass unless asked
+MEMORY_MAX_SIZE = 100_000
+
+# metric -> True if higher is better
+METRICS = {"plan_chars_per_s": True, "us_per_key": False, "peak_mb": False}
+
+def make_text(size: int) -> str:
+    """Sample text repeated up to size chars."""
+    sample = SAMPLE_FILE.read_text(encoding="utf-8")
+    return (sample * (size // len(sample) + 1))[:size]
+
+def preset_settings(name: str) -> config.Settings:
+    """Preset on top of the defaults (the user's config file is ignored)."""
+    return config.preset_settings(name, config.Settings({}))
+
+def measure_plan(text: str, settings: config.Settings) -> float:
+    """Planner alone, no AI: chars per second."""
+    started = time.perf_counter()
+    for _ in typing_engine.iter_plan(text, settings, None, randomness.SessionRandom(0)):
+        pass
+    return len(text) / (time.perf_counter() - started)
+
+def measure_dry_run(text: str, settings: config.Settings) -> float:
+    """Planner + executor: microseconds of Python time per keystroke sent."""
+    report = dryrun.dry_run(text, settings, seed=0)
+    return report["elapsed_ms"] * 1000 / max(1, report["keystrokes"])
+
+def measure_memory(text: str, settings: config.Settings) -> float:
+    """Peak traced memory of a dry run in MB (the text itself not included)."""
+    tracemalloc.start()
+    try:
+        dryrun.dry_run(text, settings, seed=0)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1e6
+
+def run(sizes: list[str], repeat: int, memory_all: bool = False) -> dict:
+    """Measure every preset at every size. Times are the best of `repeat` runs."""
+    results = {}
+    for size in sizes:
+        text = make_text(SIZES[size])
+        runs = repeat if SIZES[size] < 1_000_000 else 1
+        for preset in config_manager.PRESETS:
+            settings = preset_settings(preset)
+            key = f"{preset}/{size}"
+            results[key] = {
+                "plan_chars_per_s": max(measure_plan(text, settings) for _ in range(runs)),
+                "us_per_key": min(measure_dry_run(text, settings) for _ in range(runs)),
+            }
+            if memory_all or SIZES[size] <= MEMORY_MAX_SIZE:
+                results[key]["peak_mb"] = measure_memory(text, settings)
+            r = results[key]
+            peak = f"{r['peak_mb']:>8.2f}MB peak" if "peak_mb" in r else ""
+            print(f"{key:<20} {r['plan_chars_per_s'] / 1000:>8.0f}k chars/s {r['us_per_key']:>8.2f}us/key {peak}", flush=True)
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Get a list of regressions."""
+    problems = []
+    for key, res in results.items():
+        base = baseline.get(key)
+        if not base:
+            problems.append(f"{key}: no baseline - run with --update on this machine first")
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in res or metric not in base:
+                continue
+            value, ref = res[metric], base[metric]
+            if higher_is_better:
+                worse = value < ref * (1 - tolerance)
+            else:
+                worse = value > ref * (1 + tolerance)
+            if worse:
+                problems.append(f"{key}: {metric} {value:.2f} vs baseline {ref:.2f}")
+    return problems
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"comma-separated text sizes from {', '.join(SIZES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case below 1m (best is used)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression vs baseline (0.25 = 25%%)")
+    parser.add_argument("--memory-all", action="store_true", help=f"measure peak memory above {MEMORY_MAX_SIZE} chars too (slow)")
+    parser.add_argument("--skip-startup", action="store_true", help="don't run the startup check")
+    parser.add_argument("--update", action="store_true", help="store results as the new baseline")
+    args = parser.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown size: {', '.join(unknown)}")
+
+    results = run(sizes, args.repeat, args.memory_all)
+    status = 0 if args.skip_startup else startup.main(["--update"] if args.update else [])
+
+    if args.update:
+        BASELINE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        baseline = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+        baseline.update(results)
+        BASELINE_FILE.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"baseline written to {BASELINE_FILE}")
+        return status
+
+    baseline = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+    problems = compare(results, baseline, args.tolerance)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems or status else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Startup-time budget check based on `python -X importtime`.
+
+    python benchmarks/startup.py            # measure and compare with the stored baseline
+    python benchmarks/startup.py --update   # store the current numbers as the new baseline
+
+Exits with status 1 if an entry point got slower than its baseline by more
+than the tolerance, if it loads a module that should stay lazy, or if there's
+no baseline to compare with. Baselines are machine-specific and not committed:
+run with --update once on the machine you compare on.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_FILE = Path(__file__).resolve().parent / "baselines" / "startup.json"
+
+# entry point -> import statement
+TARGETS = {
+    "cli": "import typesim.__main__",
+    "engine": "import typesim.typing_engine",
+}
+
+# modules that must not load just by importing an entry point (AI off, no menu)
+LAZY_MODULES = ["google.genai", "inquirer", "rich", "pynput", "numpy"]
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT / "src"), env.get("PYTHONPATH")]))
+    return env
+
+def measure_importtime(stmt: str) -> tuple[int, list[tuple[int, str]]]:
+    """
+    Run stmt under -X importtime.
+    Returns (total_us, [(cumulative_us, module), ...]) for top-level imports.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", stmt],
+        capture_output=True, text=True, env=_env(), check=True,
+    )
+    top = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, raw_name = line[len("import time:"):].split("|")
+        # nested imports are indented two spaces per level
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        if depth == 0:
+            top.append((int(cumulative_us), raw_name.strip()))
+    return sum(us for us, _ in top), top
+
+def measure_process(stmt: str) -> dict:
+    """Import stmt in a fresh process; report peak RSS and which lazy modules got loaded."""
+    probe = (
+        f"{stmt}\n"
+        "import json, resource, sys\n"
+        f"lazy = [m for m in {LAZY_MODULES!r} if m in sys.modules]\n"
+        "rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+        "print(json.dumps({'rss_kb': rss, 'loaded': lazy}))\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, env=_env(), check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def run(repeat: int) -> dict:
+    """Measure every target."""
+    results = {}
+    for name, stmt in TARGETS.items():
+        totals = []
+        top = []
+        for _ in range(repeat):
+            total, top = measure_importtime(stmt)
+            totals.append(total)
+        proc = measure_process(stmt)
+        results[name] = {
+            "import_us": int(statistics.median(totals)),
+            "rss_kb": proc["rss_kb"],
+            "loaded_lazy": proc["loaded"],
+            "heaviest": [f"{us}us {mod}" for us, mod in sorted(top, reverse=True)[:5]],
+        }
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Get a list of budget violations."""
+    problems = []
+    for name, res in results.items():
+        if res["loaded_lazy"]:
+            problems.append(f"{name}: loads lazy modules {', '.join(res['loaded_lazy'])}")
+        base = baseline.get(name)
+        if not base:
+            problems.append(f"{name}: no baseline - run with --update on this machine first")
+            continue
+        limit = base["import_us"] * (1 + tolerance)
+        if res["import_us"] > limit:
+            problems.append(f"{name}: import {res['import_us']}us > budget {limit:.0f}us (baseline {base['import_us']}us)")
+        rss_limit = base["rss_kb"] * (1 + tolerance)
+        if res["rss_kb"] > rss_limit:
+            problems.append(f"{name}: rss {res['rss_kb']}kB > budget {rss_limit:.0f}kB (baseline {base['rss_kb']}kB)")
+    return problems
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per target (median is used)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--update", action="store_true", help="store results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    for name, res in results.items():
+        print(f"{name}: {res['import_us'] / 1000:.1f}ms import, {res['rss_kb'] / 1024:.1f}MB rss")
+        for line in res["heaviest"]:
+            print(f"    {line}")
+
+    if args.update:
+        BASELINE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        baseline = {name: {"import_us": r["import_us"], "rss_kb": r["rss_kb"]} for name, r in results.items()}
+        BASELINE_FILE.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"baseline written to {BASELINE_FILE}")
+        return 0
+
+    baseline = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+    problems = compare(results, baseline, args.tolerance)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,42 @@
 """
 Main CLI entry point for typesim.
 Handles text input, countdown, and integration.
+
+    typesim                                  interactive menu
+    typesim type -f FILE [--preset NAME]     headless run, no TUI
+    typesim load -f FILE -n 4 --xvfb         parallel sessions (load generator)
+    typesim load -f FILE -n 50 --async       sessions on one event loop
 """
 
+import argparse
+import contextlib
+import os
 import sys
 import time
-from rich.console import Console
 from . import keyboard_ctrl
 from . import typing_engine
 from . import shortcuts
-from . import tui
 from . import config_manager
+from . import config
+from . import progress
+from . import randomness
+from . import sinks
+from . import streaming
+from . import textprep
+from . import trace
+
+class _LazyConsole:
+    """Stand-in that creates the rich console on first use."""
+
+    _console = None
+
+    def __getattr__(self, name):
+        if _LazyConsole._console is None:
+            from rich.console import Console
+            _LazyConsole._console = Console()
+        return getattr(_LazyConsole._console, name)
 
-console = Console()
+console = _LazyConsole()
 
 def get_text_input() -> str:
     """Get multiline text input from user."""
@@ -33,6 +57,19 @@ def get_text_input() -> str:
     text = "\n".join(lines)
     return text.strip()
 
+# exit codes for headless runs
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_STOPPED = 3
+EXIT_INTERRUPTED = 130
+
+def _tick(token: shortcuts.ControlToken, seconds: float) -> bool:
+    """Sleep, waking early on stop. Returns False if stopped."""
+    deadline = time.monotonic() + seconds
+    while not token.is_stopped() and time.monotonic() < deadline:
+        token.sleep(deadline - time.monotonic())
+    return not token.is_stopped()
+
 def countdown(seconds: int = 3):
     """Show countdown before starting."""
     cfg = config_manager.get_config_manager()
@@ -40,15 +77,14 @@ def countdown(seconds: int = 3):
 
     console.print(f"\n  [dim]starting in {seconds}s... switch to target app[/dim]\n")
 
+    token = shortcuts.get_token()
     for i in range(seconds, 0, -1):
         console.print(f"  [yellow]{i}...[/yellow]")
-        time.sleep(1)
-        if shortcuts.is_stopped():
+        if not _tick(token, 1):
             return False
 
     console.print("  [green]go[/green]\n")
-    time.sleep(0.3)  # brief pause before typing starts
-    return True
+    return _tick(token, 0.3)  # brief pause before typing starts
 
 def show_shortcuts_help():
     """Show keyboard shortcuts help."""
@@ -57,14 +93,39 @@ def show_shortcuts_help():
     console.print("  [dim]ctrl-[/dim] speed down")
     console.print("  [dim]esc[/dim] stop")
 
+def show_timing_stats(stats: dict):
+    """Show measured keystroke timing jitter."""
+    console.print(
+        f"  [dim]timing jitter: mean {stats['mean_us']:.0f}us, "
+        f"p99 {stats['p99_us']:.0f}us, max {stats['max_us']:.0f}us "
+        f"over {stats['sleeps']} delays[/dim]"
+    )
+
+def finish_trace(path: str, say):
+    """Stop tracing (if running), write the trace file and show the summary."""
+    tracer = trace.stop()
+    if tracer is None:
+        return
+    say(tracer.summary())
+    try:
+        tracer.save(path)
+        say(f"trace written to {path}")
+    except OSError as e:
+        say(f"// error writing trace: {e}")
+
 def type_text(text: str):
     """Type text with all features enabled."""
     # reset shortcuts state
     shortcuts.reset()
-    cfg = config_manager.get_config_manager()
+
+    # freeze settings for this run (also loads the config before the first keystroke)
+    settings = config.publish_settings()
 
     # set initial speed multiplier
-    shortcuts.set_speed_multiplier(cfg.get('speed_multiplier', 1.0))
+    shortcuts.set_speed_multiplier(settings.speed_multiplier)
+
+    if settings.trace_file:
+        trace.start()
 
     # setup shortcuts listener
     listener = shortcuts.setup_shortcuts_listener()
@@ -74,22 +135,323 @@ def type_text(text: str):
         show_shortcuts_help()
         console.print()
 
-        # start typing
-        typing_engine.type_text_realistic(text)
+        # start typing, with a live progress panel redrawn from its own thread
+        # (sized by the prepared text, which is what gets typed)
+        tracker = progress.Progress(len(textprep.prepare_settings(text, settings)))
+        if settings.dashboard_refresh_hz > 0:
+            from . import dashboard
+            panel = dashboard.Dashboard(tracker, shortcuts.get_token(), settings.dashboard_refresh_hz)
+        else:
+            panel = contextlib.nullcontext()
+        with panel:
+            clock = typing_engine.type_text_realistic(text, settings, progress=tracker)
 
         if shortcuts.is_stopped():
             console.print("\n\n  [red]stopped[/red]")
         else:
             console.print("\n\n  [green]done[/green]")
 
+        show_timing_stats(clock.stats())
+
     except KeyboardInterrupt:
         console.print("\n\n  [yellow]interrupted[/yellow]")
         shortcuts.request_stop()
     finally:
         shortcuts.stop_listener()
+        finish_trace(settings.trace_file, lambda msg: console.print(msg, markup=False, highlight=False))
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser."""
+    parser = argparse.ArgumentParser(prog="typesim", description="Realistic typing simulator.")
+    commands = parser.add_subparsers(dest="command")
+
+    type_cmd = commands.add_parser("type", help="type text without the menu (headless)")
+    type_cmd.add_argument("-f", "--file", default="-", help="text file to type, - for stdin (default)")
+    type_cmd.add_argument("-p", "--preset", choices=sorted(config_manager.PRESETS), help="preset to use for this run")
+    type_cmd.add_argument("-s", "--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+                          help="override a config value for this run (repeatable)")
+    type_cmd.add_argument("-c", "--countdown", type=int, help="seconds to wait before typing (default from config)")
+    type_cmd.add_argument("--sink", choices=sorted(sinks.SINKS), help="where keystrokes go (default from config)")
+    type_cmd.add_argument("--window", help="X window id to type into (xdotool sink only)")
+    type_cmd.add_argument("--seed", type=int, help="random seed for a reproducible run (printed on every run)")
+    type_cmd.add_argument("-n", "--dry-run", action="store_true",
+                          help="simulate the run and report its duration instead of typing")
+    type_cmd.add_argument("--stream", action="store_true",
+                          help="type the input as it's read, keeping only a window of it (big files, pipes, FIFOs)")
+    type_cmd.add_argument("--trace", metavar="FILE", help="write a Chrome/Perfetto trace of the run to FILE")
+    type_cmd.add_argument("--no-hotkeys", action="store_true", help="don't listen for pause/speed/stop keys")
+    type_cmd.add_argument("-q", "--quiet", action="store_true", help="only print errors")
+
+    load_cmd = commands.add_parser("load", help="run many typing sessions in parallel (load generator)")
+    load_cmd.add_argument("-f", "--file", default="-", help="text file every session types, - for stdin (default)")
+    load_cmd.add_argument("-n", "--sessions", type=int, default=2, help="number of sessions (default 2)")
+    load_cmd.add_argument("-p", "--preset", default="",
+                          help="preset(s) for the sessions, comma-separated, used in turn")
+    load_cmd.add_argument("-s", "--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+                          help="override a config value for every session (repeatable)")
+    load_cmd.add_argument("--sink", choices=sorted(sinks.SINKS), default="xdotool",
+                          help="where keystrokes go (default xdotool)")
+    load_cmd.add_argument("--xvfb", action="store_true", help="start a local Xvfb server for each session")
+    load_cmd.add_argument("--display", default="", help="X display(s) to use, comma-separated, used in turn")
+    load_cmd.add_argument("--window", default="", help="X window id(s) to type into, comma-separated (xdotool sink)")
+    load_cmd.add_argument("--app", help="command to start on each display first (the UI under test)")
+    load_cmd.add_argument("--app-wait", type=float, default=1.0, help="seconds to let the app start (default 1)")
+    load_cmd.add_argument("--seed", type=int, help="seed of the first session, the others get seed+1, seed+2, ...")
+    load_cmd.add_argument("--async", dest="use_async", action="store_true",
+                          help="run all sessions on one asyncio event loop in this process instead of one process each")
+    load_cmd.add_argument("--control", type=int, metavar="PORT",
+                          help="with --async: serve pause/resume/stop/speed/status commands on 127.0.0.1:PORT (0 = any)")
+    return parser
+
+# KEY=VALUE spellings of true/false
+_BOOLS = {'true': True, 'yes': True, 'on': True, '1': True,
+          'false': False, 'no': False, 'off': False, '0': False}
+
+def setting_choices(key: str):
+    """Allowed values of a setting with a fixed set of them, else None."""
+    from . import layouts
+    return {
+        'keyboard_layout': layouts.LAYOUTS,
+        'char_translation': textprep.TRANSLATIONS,
+        'bulk_delete_mode': typing_engine.BULK_DELETE_MODES,
+        'output_sink': sinks.SINKS,
+    }.get(key)
+
+def parse_setting(key: str, raw: str):
+    """
+    Parse a KEY=VALUE override by the setting's type. Strings are taken as
+    they are (an empty trace_file stays empty) and only dict settings are
+    read as YAML. Raises ValueError if the value doesn't fit.
+    """
+    cast = config.Settings._FIELDS[key]
+    if cast is str:
+        choices = setting_choices(key)
+        if choices is not None and raw not in choices:
+            raise ValueError(f"unknown {key}: {raw!r} (choose from {', '.join(choices)})")
+        return raw
+    if cast is bool:
+        value = _BOOLS.get(raw.strip().lower())
+        if value is None:
+            raise ValueError(f"{key} needs true or false, got {raw!r}")
+        return value
+    if cast is dict:
+        import yaml
+        try:
+            value = yaml.safe_load(raw)
+        except yaml.YAMLError as e:
+            raise ValueError(f"{key} isn't valid YAML: {e}") from None
+        if not isinstance(value, dict):
+            raise ValueError(f"{key} needs a mapping like {{a: b}}, got {raw!r}")
+        return value
+    try:
+        return cast(raw)
+    except ValueError:
+        raise ValueError(f"{key} needs {'a whole number' if cast is int else 'a number'}, got {raw!r}") from None
+
+def run_settings(preset: str | None, overrides: list[str]) -> config.Settings:
+    """
+    Build settings for a headless run: saved config + preset + KEY=VALUE overrides.
+    Nothing is written back to the config file.
+    """
+    settings = config.preset_settings(preset) if preset else config.load_settings()
+    values = settings.as_dict()
+    for item in overrides:
+        key, sep, raw = item.partition("=")
+        key = key.strip()
+        if not sep or key not in config.Settings.__slots__:
+            raise ValueError(f"unknown setting: {item}")
+        values[key] = parse_setting(key, raw)
+    return config.Settings(values)
+
+def read_input(path: str) -> str:
+    """Read the text to type from a file or stdin."""
+    if path == "-":
+        if sys.stdin.isatty():
+            raise ValueError("no input - pass --file or pipe text on stdin")
+        return sys.stdin.read()
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def open_stream(path: str):
+    """Open the text to type as a binary file (stdin for -) for streaming."""
+    if path == "-":
+        if sys.stdin.isatty():
+            raise ValueError("no input - pass --file or pipe text on stdin")
+        return sys.stdin.buffer
+    return open(path, 'rb')
+
+def show_dry_run(report: dict, out=None):
+    """Print a dry run report."""
+    print(f"estimated time: {progress.format_duration(report['duration_s'])} ({report['duration_s']:.1f}s)", file=out)
+    print(f"keystrokes: {report['keystrokes']} for {report['chars']} chars "
+          f"({report['backspaces']} backspaces, {report['overhead'] * 100:.1f}% overhead)", file=out)
+    print(f"ai requests: {report['ai_requests']}", file=out)
+    print(f"simulated in {report['elapsed_ms']:.0f}ms", file=out)
+
+def run_dry(text: str, settings: config.Settings, seed: int | None) -> int:
+    """Run `typesim type --dry-run`: report on the run without typing."""
+    from . import dryrun
+    if not text:
+        print("// error: no text provided", file=sys.stderr)
+        return EXIT_ERROR
+    show_dry_run(dryrun.dry_run(text, settings, seed))
+    return EXIT_OK
+
+def run_headless(args: argparse.Namespace) -> int:
+    """Run `typesim type`: type a file or stdin with no TUI. Returns an exit code."""
+    def say(msg: str):
+        if not args.quiet:
+            print(msg, file=sys.stderr)
+
+    source = None
+    try:
+        settings = run_settings(args.preset, args.overrides)
+        if args.trace:
+            settings = settings.replace(trace_file=args.trace)
+        if args.stream:
+            if args.dry_run:
+                raise ValueError("--dry-run needs the whole text, it can't be used with --stream")
+            source = open_stream(args.file)
+            text = streaming.StreamingText(textprep.prepare_chunks(streaming.read_chunks(source), settings))
+        else:
+            text = read_input(args.file)
+        if not text:  # a stream waits here for its first chunk
+            raise ValueError("no text provided")
+        if args.dry_run:
+            return run_dry(text, settings, args.seed)
+        sink_name = args.sink or settings.output_sink
+        options = {}
+        if args.window:
+            if sink_name != "xdotool":
+                raise ValueError("--window only works with the xdotool sink")
+            options["window"] = args.window
+        sink = sinks.create_sink(sink_name, **options)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"// error: {e}", file=sys.stderr)
+        if source is not None and source is not sys.stdin.buffer:
+            source.close()
+        return EXIT_ERROR
+
+    shortcuts.reset()
+    token = shortcuts.get_token()
+    config.publish_settings(settings)
+    shortcuts.set_speed_multiplier(settings.speed_multiplier)
+    if settings.trace_file:
+        trace.start()
+    listener = None
+    if not args.no_hotkeys:
+        try:
+            listener = shortcuts.setup_shortcuts_listener()
+        except Exception as e:  # no display or no pynput - hotkeys are optional here
+            say(f"// hotkeys off: {e}")
+
+    try:
+        seconds = settings.countdown_seconds if args.countdown is None else args.countdown
+        rng = randomness.SessionRandom(args.seed)
+        what = "streamed input" if args.stream else f"{len(text)} characters"
+        say(f"typing {what} in {seconds}s (seed {rng.seed})...")
+        if not args.stream:
+            slow = textprep.slow_chars(textprep.prepare_settings(text, settings), settings.keyboard_layout)
+            if slow:
+                say(f"not on the {settings.keyboard_layout} layout, typed the slow way: {' '.join(slow[:20])}"
+                    + (f" (+{len(slow) - 20} more)" if len(slow) > 20 else ""))
+        if not _tick(token, seconds):
+            return EXIT_STOPPED
+
+        clock = typing_engine.type_text_realistic(text, settings, sink, rng)
+        stats = clock.stats()
+        say(f"timing jitter: mean {stats['mean_us']:.0f}us, p99 {stats['p99_us']:.0f}us, max {stats['max_us']:.0f}us")
+        if token.is_stopped():
+            say("stopped")
+            return EXIT_STOPPED
+        say("done")
+        return EXIT_OK
+    except KeyboardInterrupt:
+        token.request_stop()
+        say("interrupted")
+        return EXIT_INTERRUPTED
+    finally:
+        sink.close()
+        if source is not None and source is not sys.stdin.buffer:
+            source.close()
+        if listener is not None:
+            shortcuts.stop_listener()
+        finish_trace(settings.trace_file, say)
+
+def run_load(args: argparse.Namespace) -> int:
+    """Run `typesim load`: parallel typing sessions with a throughput report."""
+    from . import loadgen  # multiprocessing setup only loads for this command
+
+    servers, apps = [], []
+    try:
+        if args.sessions < 1:
+            raise ValueError("--sessions must be at least 1")
+        text = read_input(args.file)
+        if not text:
+            raise ValueError("no text provided")
+        presets = [p.strip() for p in args.preset.split(",") if p.strip()] or [None]
+        unknown = [p for p in presets if p is not None and p not in config_manager.PRESETS]
+        if unknown:
+            raise ValueError(f"unknown preset: {', '.join(unknown)}")
+        settings = [run_settings(p, args.overrides).replace(output_sink=args.sink) for p in presets]
+        windows = [w.strip() for w in args.window.split(",") if w.strip()] or [None]
+        if windows != [None] and args.sink != "xdotool":
+            raise ValueError("--window only works with the xdotool sink")
+        if args.control is not None and not args.use_async:
+            raise ValueError("--control needs --async")
+        if args.xvfb:
+            displays = []
+            for _ in range(args.sessions):
+                number = loadgen.free_display(int(displays[-1][1:]) + 1 if displays else 99)
+                servers.append(loadgen.start_xvfb(number))
+                displays.append(f":{number}")
+        else:
+            displays = [d.strip() for d in args.display.split(",") if d.strip()] or [None]
+        if args.use_async and args.sink == "pynput" and len(set(displays)) > 1:
+            raise ValueError("--async types to one display with pynput (use the xdotool sink for several)")
+        if args.app:
+            for display in dict.fromkeys(d for d in displays if d):
+                apps.append(loadgen.start_app(args.app, display))
+            time.sleep(args.app_wait)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"// error: {e}", file=sys.stderr)
+        for proc in apps + servers:
+            proc.terminate()
+        return EXIT_ERROR
+
+    sessions = loadgen.make_sessions(args.sessions, settings, presets, displays, windows, args.seed)
+    print(f"{len(sessions)} sessions, {len(text)} chars each, sink {args.sink}", file=sys.stderr)
+    on_result = lambda r: print(f"{r['name']} {'failed: ' + r['error'] if 'error' in r else 'done'}", file=sys.stderr)
+    try:
+        if args.use_async:
+            if displays[0] and args.sink == "pynput":
+                os.environ['DISPLAY'] = displays[0]
+            results, wall = loadgen.run_async(
+                sessions, text, on_result, args.control,
+                on_listen=lambda host, port: print(f"control server on {host}:{port}", file=sys.stderr),
+            )
+        else:
+            results, wall = loadgen.run(sessions, text, on_result=on_result)
+    finally:
+        for proc in apps + servers:
+            proc.terminate()
+    print(loadgen.format_report(results, wall))
+    return EXIT_OK if all('error' not in r for r in results) else EXIT_ERROR
 
-def main():
+def main(argv: list[str] | None = None) -> int:
     """Main entry point."""
+    args = build_parser().parse_args(argv)
+    if args.command == "type":
+        return run_headless(args)
+    if args.command == "load":
+        return run_load(args)
+
+    run_menu()
+    return EXIT_OK
+
+def run_menu():
+    """Interactive menu loop."""
+    from . import tui  # menu stack (inquirer + rich) only loads for the menu
     # reset stop flag
     keyboard_ctrl.set_stop_flag(False)
     shortcuts.reset()
@@ -114,7 +476,8 @@ def main():
                 input("\n  [dim]press enter...[/dim]")
                 continue
 
-            console.print(f"\n  [dim]{len(text)} characters[/dim]")
+            tui.set_loaded_text(text)
+            console.print(f"\n  [dim]{len(text)} characters, about {tui.estimate_time()}[/dim]")
             console.print("  [dim]press enter to start...[/dim]")
 
             try:
@@ -144,7 +507,8 @@ def main():
             text = tui.get_file_path()
 
             if text:
-                console.print(f"\n  [green]loaded {len(text)} characters[/green]")
+                tui.set_loaded_text(text)
+                console.print(f"\n  [green]loaded {len(text)} characters[/green] [dim]about {tui.estimate_time()}[/dim]")
                 console.print("  [dim]press enter to start...[/dim]")
 
                 try:
@@ -170,8 +534,9 @@ def main():
             from rich.prompt import Confirm
             if Confirm.ask("  [yellow]reset all settings to defaults?[/yellow]"):
                 cfg.reset_to_defaults()
+                config.publish_settings()
                 console.print("  [green]reset to defaults[/green]")
                 input("\n  [dim]press enter...[/dim]")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Persistent cache for Gemini results.
+SQLite file in ~/.typesim with LRU eviction and a TTL,
+plus a small in-process memo on top.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+from . import config_manager
+
+CACHE_FILE = config_manager.CONFIG_DIR / "ai_cache.sqlite3"
+
+# evict at most every this many writes
+EVICT_EVERY = 100
+
+def normalize(text: str) -> str:
+    """Normalize input text for use in a cache key."""
+    return ' '.join(text.split())
+
+class AICache:
+    """Two-level (memory + SQLite) LRU cache for AI results."""
+
+    def __init__(self, path=CACHE_FILE, max_entries: int = 20000, ttl_seconds: float = 30 * 86400,
+                 memo_size: int = 2048, enabled: bool = True):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.memo_size = memo_size
+        self.enabled = enabled
+        self._memo = OrderedDict()  # key -> (value, created)
+        self._db = None
+        self._db_failed = False
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, func: str, text: str) -> str:
+        """Build a cache key from model, function and normalized input."""
+        return f"{model}\x1f{func}\x1f{normalize(text)}"
+
+    def _connect(self):
+        """Open the database on first use. Returns None if unavailable."""
+        if self._db is None and not self._db_failed:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                db = sqlite3.connect(str(self.path), check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                    "created REAL NOT NULL, last_used REAL NOT NULL)"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS cache_last_used ON cache(last_used)")
+                db.commit()
+                self._db = db
+            except (sqlite3.Error, OSError) as e:
+                print(f"// ai cache error: {e}")
+                self._db_failed = True
+        return self._db
+
+    def _memo_put(self, key: str, value: Any, created: float):
+        self._memo[key] = (value, created)
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    def get(self, model: str, func: str, text: str) -> Any | None:
+        """Get a cached value, or None on a miss or expired entry."""
+        if not self.enabled:
+            return None
+
+        key = self.make_key(model, func, text)
+        now = time.time()
+        with self._lock:
+            hit = self._memo.get(key)
+            if hit is not None:
+                value, created = hit
+                if now - created <= self.ttl_seconds:
+                    self._memo.move_to_end(key)
+                    return value
+                del self._memo[key]
+
+            db = self._connect()
+            if db is None:
+                return None
+            try:
+                row = db.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                if now - row[1] > self.ttl_seconds:
+                    db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    db.commit()
+                    return None
+                db.execute("UPDATE cache SET last_used = ? WHERE key = ?", (now, key))
+                db.commit()
+                value = json.loads(row[0])
+            except (sqlite3.Error, ValueError) as e:
+                print(f"// ai cache error: {e}")
+                return None
+
+            self._memo_put(key, value, row[1])
+            return value
+
+    def put(self, model: str, func: str, text: str, value: Any):
+        """Store a value (must be JSON-serializable)."""
+        if not self.enabled:
+            return
+
+        key = self.make_key(model, func, text)
+        now = time.time()
+        with self._lock:
+            self._memo_put(key, value, now)
+
+            db = self._connect()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, created, last_used) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now, now),
+                )
+                self._writes += 1
+                if self._writes % EVICT_EVERY == 0:
+                    self._evict(db, now)
+                db.commit()
+            except (sqlite3.Error, TypeError) as e:
+                print(f"// ai cache error: {e}")
+
+    def _evict(self, db, now: float):
+        """Drop expired entries, then least recently used ones over the size limit."""
+        db.execute("DELETE FROM cache WHERE created < ?", (now - self.ttl_seconds,))
+        (count,) = db.execute("SELECT COUNT(*) FROM cache").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            db.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+
+    def clear(self):
+        """Remove everything from the cache."""
+        with self._lock:
+            self._memo.clear()
+            db = self._connect()
+            if db is not None:
+                try:
+                    db.execute("DELETE FROM cache")
+                    db.commit()
+                except sqlite3.Error as e:
+                    print(f"// ai cache error: {e}")
+
+# global instance
+_cache = None
+
+def get_cache() -> AICache:
+    """Get global AI cache instance (configured from the config manager)."""
+    global _cache
+    if _cache is None:
+        cfg = config_manager.get_config_manager()
+        _cache = AICache(
+            max_entries=int(cfg.get('ai_cache_max_entries', 20000)),
+            ttl_seconds=float(cfg.get('ai_cache_ttl_days', 30)) * 86400,
+            enabled=bool(cfg.get('ai_cache', True)),
+        )
+    return _cache
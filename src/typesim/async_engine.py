@@ -0,0 +1,198 @@
+"""
+asyncio typing engine: the planner from typing_engine with an executor that
+awaits instead of blocking, so many sessions, their AI prefetch tasks and a
+control server can share one event loop (and one thread).
+
+A session is a task: cancelling it stops typing at its next wait, and a
+pause, stop or speed change on its control token wakes its sleep right away,
+as in the blocking engine.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Iterable
+from . import config
+from . import keyboard_ctrl
+from . import progress as progress_mod
+from . import randomness
+from . import scheduler
+from . import shortcuts
+from . import sinks
+from . import textprep
+from . import trace
+from . import typing_engine
+from .typing_engine import TYPE, BACKSPACE, BULK_BACKSPACE, WORD_BACKSPACE, SLEEP, PROGRESS
+
+if TYPE_CHECKING:
+    from .streaming import StreamingText
+
+async def execute_plan_async(plan: Iterable[tuple], settings: config.Settings | None = None,
+                             token: shortcuts.ControlToken | None = None,
+                             sink: sinks.Sink | None = None, clock: scheduler.AsyncDeadlineScheduler | None = None,
+                             progress: progress_mod.Progress | None = None) -> scheduler.AsyncDeadlineScheduler:
+    """
+    typing_engine.execute_plan() as a coroutine: same bursts and deadlines,
+    but delays, pauses, flushes and paced backspaces are awaited.
+    Returns the scheduler so callers can report its timing jitter.
+    """
+    if settings is None:
+        settings = config.get_settings()
+    if token is None:
+        token = shortcuts.get_token()
+    if sink is None:
+        sink = keyboard_ctrl.get_sink()
+
+    if clock is None:
+        clock = scheduler.AsyncDeadlineScheduler(token)
+    timer = clock
+    tracer = trace.get_tracer()
+    if tracer is not None:
+        sink = trace.TracedSink(sink, tracer)
+        timer = trace.AsyncTracedClock(clock, tracer)
+    backspace_interval = settings.backspace_delay_ms / 1000.0
+    burst_interval = 1.0 / settings.backspace_burst_rate if settings.backspace_burst_rate > 0 else 0.0
+    floor = settings.coalesce_below_ms
+    pending = ''  # text typed since the last sleep, sent as one burst
+    owed = 0.0  # ms of delay not slept yet
+    keys = 0
+    try:
+        for op, arg in plan:
+            if token.is_stopped():
+                break
+
+            if op == TYPE:
+                pending += arg
+                keys += len(arg)
+            elif op == SLEEP:
+                owed += arg
+                if owed < floor * token.speed:
+                    continue
+                if pending:
+                    sink.type_text(pending)
+                    pending = ''
+                await sink.flush_async()
+                await timer.sleep(owed / 1000.0)
+                owed = 0.0
+                if token.is_paused():
+                    await token.wait_resumed_async()
+                    timer.resync()
+            elif op == PROGRESS:
+                if progress is not None:
+                    progress.update(arg, keys)
+            else:
+                if pending:
+                    sink.type_text(pending)
+                    pending = ''
+                paced = 0.0
+                if op == BACKSPACE:
+                    paced = backspace_interval
+                    await sink.backspace_async(arg, paced, token)
+                elif op == BULK_BACKSPACE:
+                    paced = burst_interval
+                    await sink.backspace_async(arg, paced, token)
+                elif op == WORD_BACKSPACE:
+                    paced = burst_interval
+                    await sink.word_backspace_async(arg, paced, token)
+                keys += arg
+                if paced:
+                    timer.resync()
+        else:
+            if pending:
+                sink.type_text(pending)
+            if owed:
+                await sink.flush_async()
+                await timer.sleep(owed / 1000.0)
+    finally:
+        await sink.flush_async()
+
+    return clock
+
+async def type_text_async(text: str | StreamingText, settings: config.Settings | None = None,
+                          sink: sinks.Sink | None = None,
+                          rng: randomness.SessionRandom | None = None,
+                          progress: progress_mod.Progress | None = None,
+                          token: shortcuts.ControlToken | None = None) -> scheduler.AsyncDeadlineScheduler:
+    """
+    typing_engine.type_text_realistic() as a coroutine.
+    Sessions sharing a loop each need their own sink and control token (the
+    default is the global one). AI requests run as tasks on the same loop.
+    A StreamingText still reads its input blocking, so give it a fast source.
+    """
+    if settings is None:
+        settings = config.get_settings()
+    if isinstance(text, str):
+        text = textprep.prepare_settings(text, settings)
+    if rng is None:
+        rng = randomness.SessionRandom()
+
+    ai = None
+    if settings.use_ai:
+        from . import prefetch
+        ai = prefetch.AsyncPrefetcher(text, typing_engine.pick_rephrase_span, rng=rng.spans)
+    try:
+        plan = typing_engine.iter_plan(text, settings, ai, rng)
+        return await execute_plan_async(plan, settings, token, sink, progress=progress)
+    finally:
+        if ai is not None:
+            ai.close()
+
+def control_command(tokens: dict[str, shortcuts.ControlToken], line: str) -> str:
+    """
+    Run one control server command against the sessions' tokens:
+        pause|resume|stop [NAME ...]
+        speed X [NAME ...]
+        status
+    Commands without names go to every session. The answer's last line is
+    "ok" or "error: ..." (status lists the sessions before it).
+    """
+    words = line.split()
+    if not words:
+        return "error: empty command"
+    command, names = words[0].lower(), words[1:]
+    if command == "status":
+        lines = [f"{name} {'stopped' if t.is_stopped() else 'paused' if t.is_paused() else 'running'} {t.speed:.2f}x"
+                 for name, t in tokens.items()]
+        return '\n'.join(lines + ["ok"])
+    speed = None
+    if command == "speed":
+        if not names:
+            return "error: speed needs a multiplier"
+        try:
+            speed = float(names.pop(0))
+        except ValueError:
+            return "error: speed needs a number"
+    elif command not in ("pause", "resume", "stop"):
+        return f"error: unknown command: {command}"
+    unknown = [name for name in names if name not in tokens]
+    if unknown:
+        return f"error: unknown session: {', '.join(unknown)}"
+    for name in names or tokens:
+        token = tokens[name]
+        if command == "pause":
+            token.set_paused(True)
+        elif command == "resume":
+            token.set_paused(False)
+        elif command == "stop":
+            token.request_stop()
+        else:
+            token.set_speed(speed)
+    return "ok"
+
+async def serve_control(tokens: dict[str, shortcuts.ControlToken], host: str = "127.0.0.1",
+                        port: int = 0) -> asyncio.Server:
+    """
+    Start a line-based control server for a set of sessions on the running loop
+    (see control_command). Port 0 picks a free port.
+    """
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            async for line in reader:
+                writer.write((control_command(tokens, line.decode(errors='replace')) + '\n').encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
@@ -5,6 +5,7 @@ Now uses config_manager for dynamic configuration.
 
 import random
 from . import config_manager
+from . import layouts
 
 def _get_cfg(key: str, default):
     """Get config value from manager."""
@@ -49,63 +50,148 @@ def SENTENCE_REPHRASE_PROBABILITY():
 def USE_AI():
     return _get_cfg('use_ai', True)
 
-# QWERTY keyboard neighbor mappings for realistic typos
-# maps each key to its neighboring keys that are easy to hit by mistake
-KEYBOARD_NEIGHBORS = {
-    'q': ['w', 'a'],
-    'w': ['q', 'e', 'a', 's'],
-    'e': ['w', 'r', 's', 'd'],
-    'r': ['e', 't', 'd', 'f'],
-    't': ['r', 'y', 'f', 'g'],
-    'y': ['t', 'u', 'g', 'h'],
-    'u': ['y', 'i', 'h', 'j'],
-    'i': ['u', 'o', 'j', 'k'],
-    'o': ['i', 'p', 'k', 'l'],
-    'p': ['o', 'l'],
-    'a': ['q', 'w', 's', 'z'],
-    's': ['a', 'w', 'e', 'd', 'x', 'z'],
-    'd': ['s', 'e', 'r', 'f', 'c', 'x'],
-    'f': ['d', 'r', 't', 'g', 'v', 'c'],
-    'g': ['f', 't', 'y', 'h', 'b', 'v'],
-    'h': ['g', 'y', 'u', 'j', 'n', 'b'],
-    'j': ['h', 'u', 'i', 'k', 'm', 'n'],
-    'k': ['j', 'i', 'o', 'l', 'm'],
-    'l': ['k', 'o', 'p'],
-    'z': ['a', 's', 'x'],
-    'x': ['z', 's', 'd', 'c'],
-    'c': ['x', 'd', 'f', 'v'],
-    'v': ['c', 'f', 'g', 'b'],
-    'b': ['v', 'g', 'h', 'n'],
-    'n': ['b', 'h', 'j', 'm'],
-    'm': ['n', 'j', 'k'],
-}
-
-# uppercase versions too
-for key in list(KEYBOARD_NEIGHBORS.keys()):
-    KEYBOARD_NEIGHBORS[key.upper()] = [n.upper() for n in KEYBOARD_NEIGHBORS[key]]
-
-def get_neighbor_key(char: str) -> str | None:
+class Settings:
+    """
+    Frozen snapshot of the typing config.
+    Built once per run so the engine reads plain attributes instead of
+    going through the config manager for every keystroke.
+    """
+    
+    # field name -> type the value is coerced to
+    _FIELDS = {
+        'typo_probability': float,
+        'edit_probability': float,
+        'sentence_rephrase_probability': float,
+        'base_delay_min': float,
+        'base_delay_max': float,
+        'thinking_pause_min': float,
+        'thinking_pause_max': float,
+        'sentence_pause_min': float,
+        'sentence_pause_max': float,
+        'comma_pause_min': float,
+        'comma_pause_max': float,
+        'use_ai': bool,
+        'countdown_seconds': int,
+        'speed_multiplier': float,
+        'keyboard_layout': str,
+        'char_translation': str,
+        'char_map': dict,
+        'timer_spin_us': int,
+        'coalesce_below_ms': float,
+        'backspace_delay_ms': float,
+        'bulk_delete_threshold': int,
+        'bulk_delete_mode': str,
+        'backspace_burst_rate': float,
+        'output_sink': str,
+        'dashboard_refresh_hz': float,
+        'trace_file': str,
+    }
+    __slots__ = tuple(_FIELDS)
+    
+    typo_probability: float
+    edit_probability: float
+    sentence_rephrase_probability: float
+    base_delay_min: float
+    base_delay_max: float
+    thinking_pause_min: float
+    thinking_pause_max: float
+    sentence_pause_min: float
+    sentence_pause_max: float
+    comma_pause_min: float
+    comma_pause_max: float
+    use_ai: bool
+    countdown_seconds: int
+    speed_multiplier: float
+    keyboard_layout: str
+    char_translation: str
+    char_map: dict
+    timer_spin_us: int
+    coalesce_below_ms: float
+    backspace_delay_ms: float
+    bulk_delete_threshold: int
+    bulk_delete_mode: str
+    backspace_burst_rate: float
+    output_sink: str
+    dashboard_refresh_hz: float
+    trace_file: str
+    
+    def __init__(self, values: dict):
+        defaults = config_manager.DEFAULT_CONFIG
+        for key, cast in self._FIELDS.items():
+            value = values.get(key)
+            if value is None:
+                value = defaults[key]
+            object.__setattr__(self, key, cast(value))
+    
+    def __setattr__(self, key, value):
+        raise AttributeError("settings are frozen, use replace() and publish_settings()")
+    
+    def __delattr__(self, key):
+        raise AttributeError("settings are frozen")
+    
+    def __repr__(self):
+        return f"Settings({self.as_dict()!r})"
+    
+    def as_dict(self) -> dict:
+        """Get settings as a plain dict."""
+        return {key: getattr(self, key) for key in self.__slots__}
+    
+    def replace(self, **changes) -> 'Settings':
+        """Get a new snapshot with some values changed."""
+        values = self.as_dict()
+        values.update(changes)
+        return Settings(values)
+
+# currently published settings snapshot
+_settings = None
+
+def load_settings() -> Settings:
+    """Build a fresh settings snapshot from the config manager."""
+    return Settings(config_manager.get_config_manager().config)
+
+def get_settings() -> Settings:
+    """Get the currently published settings snapshot."""
+    global _settings
+    if _settings is None:
+        _settings = load_settings()
+    return _settings
+
+def preset_settings(name: str, base: Settings | None = None) -> Settings:
+    """Get settings with a preset applied on top (nothing is saved or published)."""
+    preset = config_manager.PRESETS[name]
+    values = (base if base is not None else load_settings()).as_dict()
+    values.update({k: v for k, v in preset.items() if k not in ('name', 'description')})
+    return Settings(values)
+
+def publish_settings(settings: Settings | None = None) -> Settings:
+    """
+    Publish a new settings snapshot (rebuilt from the config manager if not given).
+    A running engine picks it up at the next word boundary.
+    """
+    global _settings
+    _settings = settings if settings is not None else load_settings()
+    return _settings
+
+def get_neighbor_key(char: str, rng=random, layout: str = layouts.DEFAULT_LAYOUT) -> str | None:
     """Get a random neighboring key for a typo, or None if no neighbors."""
-    neighbors = KEYBOARD_NEIGHBORS.get(char.lower())
+    table = layouts.get_table(layout)
+    code = ord(char)
+    neighbors = table[code] if code < len(table) else None
     if neighbors:
-        neighbor = random.choice(neighbors)
-        # preserve case
-        return neighbor.upper() if char.isupper() else neighbor
+        return rng.choice(neighbors)
     return None
 
-def random_delay(min_ms: int, max_ms: int) -> float:
+def random_delay(min_ms: int, max_ms: int, rng=random) -> float:
     """Get random delay in seconds."""
-    return random.uniform(min_ms, max_ms) / 1000.0
+    return rng.uniform(min_ms, max_ms) / 1000.0
 
-def should_make_typo() -> bool:
-    """Check if we should make a typo based on probability."""
-    return random.random() < TYPO_PROBABILITY()
-
-def should_edit() -> bool:
+def should_edit(settings: Settings | None = None, rng=random) -> bool:
     """Check if we should go back and edit something."""
-    return random.random() < EDIT_PROBABILITY()
+    p = settings.edit_probability if settings is not None else EDIT_PROBABILITY()
+    return rng.random() < p
 
-def should_rephrase_sentence() -> bool:
+def should_rephrase_sentence(settings: Settings | None = None, rng=random) -> bool:
     """Check if we should rephrase a sentence."""
-    return random.random() < SENTENCE_REPHRASE_PROBABILITY()
+    p = settings.sentence_rephrase_probability if settings is not None else SENTENCE_REPHRASE_PROBABILITY()
+    return rng.random() < p
 
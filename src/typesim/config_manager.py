@@ -26,6 +26,28 @@ DEFAULT_CONFIG = {
     "use_ai": True,
     "countdown_seconds": 3,
     "speed_multiplier": 1.0,  # 1.0 = normal, 0.5 = slower, 2.0 = faster
+    "keyboard_layout": "qwerty",  # qwerty, qwertz, azerty, dvorak (which keys typos hit)
+    "char_translation": "off",  # off, typographic (smart quotes/dashes -> ascii), ascii (also strips accents)
+    "char_map": {},  # extra {char: replacement} applied to the text before typing
+    "timer_spin_us": 500,  # busy-wait before short deadlines for sub-ms precision (0 = off)
+    "coalesce_below_ms": 5,  # keystrokes closer together than this are sent in bursts (0 = off)
+    "backspace_delay_ms": 10,  # delay between normal backspaces
+    "bulk_delete_threshold": 8,  # deletions this long (chars) use the bulk delete mode
+    "bulk_delete_mode": "burst",  # burst = fast backspaces, word = Ctrl+Backspace, off
+    "backspace_burst_rate": 200,  # backspaces per second in bulk mode (0 = no delay)
+    "output_sink": "pynput",  # pynput, xdotool, ydotool, null, recording
+    "dashboard_refresh_hz": 4,  # live progress panel redraws per second (0 = off)
+    "trace_file": "",  # write a Chrome trace of each run here (empty = off)
+    "ai_cache": True,  # cache gemini results in ~/.typesim/ai_cache.sqlite3
+    "ai_cache_max_entries": 20000,
+    "ai_cache_ttl_days": 30,
+    "ai_timeout_ms": 8000,  # per-request timeout
+    "ai_call_deadline_s": 20,  # max time for one call including retries
+    "ai_max_retries": 2,
+    "ai_requests_per_minute": 60,
+    "ai_burst": 5,
+    "ai_breaker_threshold": 3,  # failures before ai calls are paused
+    "ai_breaker_cooldown_s": 60,
 }
 
 # preset configurations
@@ -0,0 +1,66 @@
+"""
+Live progress panel shown while typing.
+rich.live redraws it from its own thread at a bounded rate, so the emit
+loop only pays for updating a Progress object at word ends.
+"""
+
+import time
+from rich import box
+from rich.live import Live
+from rich.table import Table
+from . import progress as progress_mod
+from . import shortcuts
+
+class Dashboard:
+    """
+    Shows position, throughput, keystroke overhead, speed, pause state and ETA.
+    Use as a context manager around the typing call.
+    """
+
+    def __init__(self, progress: progress_mod.Progress, token: shortcuts.ControlToken,
+                 refresh_hz: float = 4, console=None):
+        self.progress = progress
+        self.token = token
+        self.refresh_hz = refresh_hz
+        self.console = console
+        self._active = 0.0  # seconds spent typing, pauses excluded
+        self._last = None
+        self._live = None
+
+    def _tick(self):
+        """Add the time since the last redraw unless paused."""
+        now = time.monotonic()
+        if self._last is not None and not self.token.is_paused():
+            self._active += now - self._last
+        self._last = now
+
+    def render(self) -> Table:
+        """Build the panel (called by rich.live on each refresh)."""
+        self._tick()
+        p = self.progress
+        cps = p.position / self._active if self._active > 0 else 0.0
+        remaining = p.total - p.position
+        eta = progress_mod.format_duration(remaining / cps) if cps > 0 else "--"
+
+        table = Table(box=box.SIMPLE, show_header=False, show_edge=False, padding=(0, 2))
+        table.add_column(style="dim", no_wrap=True)
+        table.add_column(style="yellow", justify="right")
+        table.add_row("progress", f"{p.position}/{p.total} ({p.fraction * 100:.0f}%)")
+        table.add_row("speed", f"{cps:.1f} chars/s, {cps * 12:.0f} wpm")  # 5 chars per word
+        table.add_row("keystrokes", f"{p.keystrokes} ({p.overhead:.2f} per char)")
+        table.add_row("multiplier", f"{self.token.speed:.1f}x")
+        table.add_row("state", "[yellow]paused[/yellow]" if self.token.is_paused() else "[green]typing[/green]")
+        table.add_row("elapsed", progress_mod.format_duration(self._active))
+        table.add_row("eta", eta)
+        return table
+
+    def __enter__(self):
+        self._last = time.monotonic()
+        self._live = Live(get_renderable=self.render, refresh_per_second=self.refresh_hz,
+                          console=self.console)
+        self._live.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self._live.__exit__(*exc)
+        return False
@@ -0,0 +1,83 @@
+"""
+Dry runs: the full typing logic against a virtual clock and a null sink.
+Tells how long a text would take with some settings, without typing it
+or waiting for it.
+"""
+
+import time
+from concurrent.futures import Future
+from . import config
+from . import prefetch
+from . import randomness
+from . import scheduler
+from . import shortcuts
+from . import sinks
+from . import textprep
+from . import typing_engine
+
+def _done(result) -> Future:
+    future = Future()
+    future.set_result(result)
+    return future
+
+class DryRunPrefetcher(prefetch.Prefetcher):
+    """
+    Prefetcher that counts the AI requests it would send instead of sending them.
+    Every suggestion is ready at once, with stand-in text of a similar length.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.requests = 0
+        super().__init__(*args, **kwargs)
+
+    def _fetch_synonyms(self, words: list[str]) -> Future:
+        self.requests += 1
+        return _done({word: [word] for word in words})
+
+    def _fetch_rephrasings(self, spans: list[str]) -> Future:
+        self.requests += 1
+        return _done({span: ' '.join(reversed(span.split())) for span in spans})
+
+    def _fetch_insertions(self) -> Future:
+        self.requests += 1
+        return _done([])  # the engine falls back to its own filler words
+
+def dry_run(text: str, settings: config.Settings | None = None, seed: int | None = None) -> dict:
+    """
+    Simulate typing text and report what the run would look like:
+    duration_s (simulated), keystrokes, backspaces, overhead (extra keystrokes
+    per char of text), ai_requests (before the AI cache) and elapsed_ms (real
+    time the dry run took).
+    """
+    if settings is None:
+        settings = config.get_settings()
+    started = time.perf_counter()
+    text = textprep.prepare_settings(text, settings)
+
+    rng = randomness.SessionRandom(seed)
+    token = shortcuts.ControlToken()  # not the global one - hotkeys don't apply here
+    token.set_speed(settings.speed_multiplier)
+    clock = scheduler.VirtualClock(token)
+    sink = sinks.NullSink()
+
+    ai = None
+    if settings.use_ai:
+        ai = DryRunPrefetcher(text, typing_engine.pick_rephrase_span, rng=rng.spans)
+    try:
+        plan = typing_engine.iter_plan(text, settings, ai, rng)
+        typing_engine.execute_plan(plan, settings, token, sink, clock)
+    finally:
+        if ai is not None:
+            ai.close()
+
+    # paced backspaces are waited out in the sink, and the executor resyncs after
+    # them instead of taking that time out of the next delay - so they add up
+    return {
+        'chars': len(text),
+        'duration_s': clock.elapsed + sink.paced,
+        'keystrokes': sink.keystrokes,
+        'backspaces': sink.backspaces,
+        'overhead': sink.keystrokes / len(text) - 1 if text else 0.0,
+        'ai_requests': ai.requests if ai is not None else 0,
+        'elapsed_ms': (time.perf_counter() - started) * 1000,
+    }
@@ -1,105 +1,372 @@
 """
 Gemini API helper for getting synonyms and rephrasing sentences.
+Results are cached on disk (see ai_cache), so repeated words and
+documents don't cost another network round-trip.
 """
 
+import json
 import os
-from google import genai
-from google.genai import types
+from . import ai_cache
+from . import config_manager
+from . import resilience
+from . import trace
 
 # global client instance
 _gemini_client = None
+_guard = None
 DEFAULT_GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-3.1-flash-lite-preview")
 
+# max items per batched request
+BATCH_WORDS = 200
+BATCH_SENTENCES = 40
+
+# structured output schemas for batched requests
+_SYNONYMS_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "id": {"type": "INTEGER"},
+            "synonyms": {"type": "ARRAY", "items": {"type": "STRING"}},
+        },
+        "required": ["id", "synonyms"],
+    },
+}
+_REPHRASE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "id": {"type": "INTEGER"},
+            "rephrased": {"type": "STRING"},
+        },
+        "required": ["id", "rephrased"],
+    },
+}
+
 def get_client():
-    """Get or create Gemini client."""
+    """Get or create Gemini client (google.genai is only imported here, on first use)."""
     global _gemini_client
     if _gemini_client is None:
+        from google import genai
+        from google.genai import types
+        
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("GEMINI_API_KEY environment variable not set")
-        _gemini_client = genai.Client(api_key=api_key)
+        cfg = config_manager.get_config_manager()
+        http_options = types.HttpOptions(
+            timeout=int(cfg.get('ai_timeout_ms', 8000)),
+            # point at a local stub server for testing
+            base_url=os.getenv("GEMINI_BASE_URL") or None,
+        )
+        _gemini_client = genai.Client(api_key=api_key, http_options=http_options)
     return _gemini_client
 
+def _breaker_opened(cooldown: float):
+    print(f"// gemini unavailable, ai features paused for {cooldown:.0f}s")
+
+def get_guard() -> resilience.Guard:
+    """Get the rate limiter / retry / circuit breaker guard for API calls."""
+    global _guard
+    if _guard is None:
+        cfg = config_manager.get_config_manager()
+        _guard = resilience.Guard(
+            resilience.TokenBucket(
+                rate=float(cfg.get('ai_requests_per_minute', 60)) / 60.0,
+                burst=int(cfg.get('ai_burst', 5)),
+            ),
+            resilience.CircuitBreaker(
+                threshold=int(cfg.get('ai_breaker_threshold', 3)),
+                cooldown=float(cfg.get('ai_breaker_cooldown_s', 60)),
+                on_open=_breaker_opened,
+            ),
+            max_retries=int(cfg.get('ai_max_retries', 2)),
+            deadline=float(cfg.get('ai_call_deadline_s', 20)),
+        )
+    return _guard
+
+@trace.traced('gemini.request', 'ai')
+def _generate_content(prompt: str, temperature: float, schema: dict | None = None):
+    """Call generate_content through the guard."""
+    def call():
+        client = get_client()
+        from google.genai import types
+        
+        structured = {}
+        if schema is not None:
+            structured = {"response_mime_type": "application/json", "response_schema": schema}
+        config = types.GenerateContentConfig(temperature=temperature, **structured)
+        return client.models.generate_content(
+            model=DEFAULT_GEMINI_MODEL,
+            contents=prompt,
+            config=config,
+        )
+    
+    return get_guard().call(call)
+
+@trace.traced_async('gemini.request', 'ai')
+async def _generate_content_async(prompt: str, temperature: float, schema: dict | None = None):
+    """_generate_content() on the client's asyncio API."""
+    async def call():
+        client = get_client()
+        from google.genai import types
+        
+        structured = {}
+        if schema is not None:
+            structured = {"response_mime_type": "application/json", "response_schema": schema}
+        config = types.GenerateContentConfig(temperature=temperature, **structured)
+        return await client.aio.models.generate_content(
+            model=DEFAULT_GEMINI_MODEL,
+            contents=prompt,
+            config=config,
+        )
+    
+    return await get_guard().call_async(call)
+
+def _report(what: str, e: Exception):
+    """Print an API error (quietly skips calls refused by the guard)."""
+    if not isinstance(e, (resilience.CircuitOpenError, resilience.RateLimitedError, resilience.StoppedError)):
+        print(f"// gemini error {what}: {e}")
+
+def _cached(func: str, key: str, fetch):
+    """Return a cached result for (model, func, key), or fetch and store it."""
+    cache = ai_cache.get_cache()
+    value = cache.get(DEFAULT_GEMINI_MODEL, func, key)
+    if value is None:
+        value = fetch()
+        if value:  # don't cache empty answers
+            cache.put(DEFAULT_GEMINI_MODEL, func, key, value)
+    return value
+
+def _clean_synonyms(words: list[str], count: int) -> list[str]:
+    """Keep only reasonable single words."""
+    words = [w.strip() for w in words if isinstance(w, str)]
+    words = [w for w in words if w and len(w) < 20 and w.isalpha()]
+    return words[:count]
+
+def _clean_rephrased(result: str) -> str:
+    """Clean up any quotes or extra formatting."""
+    return result.strip().strip('"').strip("'").strip()
+
+def _generate_json(prompt: str, schema: dict, temperature: float) -> list:
+    """Run a structured (JSON) request and return the parsed list."""
+    return _parse_json(_generate_content(prompt, temperature, schema))
+
+async def _generate_json_async(prompt: str, schema: dict, temperature: float) -> list:
+    """_generate_json() on the asyncio API."""
+    return _parse_json(await _generate_content_async(prompt, temperature, schema))
+
+def _parse_json(response) -> list:
+    result = json.loads(response.text)
+    return result if isinstance(result, list) else []
+
+def _numbered(items: list[str]) -> str:
+    """Format items as an id-numbered JSON list for a prompt."""
+    return json.dumps([{"id": i, "text": item} for i, item in enumerate(items)], ensure_ascii=False)
+
+@trace.traced('gemini.similar_words', 'ai')
 def get_similar_words(word: str, count: int = 5) -> list[str]:
     """
     Get similar meaning words/synonyms for a word.
     Returns list of alternative words.
     """
-    try:
-        client = get_client()
+    def fetch():
         prompt = f"""Give me {count} alternative words or synonyms for "{word}" that have similar meaning.
 Return ONLY a comma-separated list of words, nothing else. No explanations, no numbers, just words separated by commas.
 Example format: word1, word2, word3"""
         
-        response = client.models.generate_content(
-            model=DEFAULT_GEMINI_MODEL,
-            contents=prompt,
-            config=types.GenerateContentConfig(temperature=0.7)
-        )
+        response = _generate_content(prompt, 0.7)
         
         result = response.text.strip()
         # parse comma-separated words
-        words = [w.strip() for w in result.split(',')]
-        # filter out empty and keep only reasonable length words
-        words = [w for w in words if w and len(w) < 20 and w.isalpha()]
-        return words[:count]
+        return _clean_synonyms(result.split(','), count)
+    
+    try:
+        return _cached(f"similar_words:{count}", word.lower(), fetch)
     
     except Exception as e:
         # fallback to empty list if API fails
-        print(f"// gemini error getting synonyms: {e}")
+        _report("getting synonyms", e)
         return []
 
+@trace.traced('gemini.rephrase', 'ai')
 def rephrase_sentence(sentence: str) -> str:
     """
     Rephrase a sentence to have similar meaning but different wording.
     Returns the rephrased version.
     """
-    try:
-        client = get_client()
+    def fetch():
         prompt = f"""Rephrase this sentence to have the same meaning but different wording. 
 Keep it natural and human-like. Return ONLY the rephrased sentence, nothing else.
 
 Original: {sentence}"""
         
-        response = client.models.generate_content(
-            model=DEFAULT_GEMINI_MODEL,
-            contents=prompt,
-            config=types.GenerateContentConfig(temperature=0.8)
-        )
+        response = _generate_content(prompt, 0.8)
         
-        result = response.text.strip()
-        # clean up any quotes or extra formatting
-        result = result.strip('"').strip("'").strip()
-        return result
+        return _clean_rephrased(response.text)
+    
+    try:
+        return _cached("rephrase", sentence, fetch) or sentence
     
     except Exception as e:
         # fallback to original if API fails
-        print(f"// gemini error rephrasing: {e}")
+        _report("rephrasing", e)
         return sentence
 
+_INSERTIONS_PROMPT = """Give me 10 short filler words or phrases (1-3 words each) that someone might type while thinking, then delete.
+Examples: "actually", "really", "kind of", "sort of", "I mean", "well", "hmm", "like", "you know"
+Return ONLY a comma-separated list, nothing else."""
+
+# used when the API fails
+_FALLBACK_INSERTIONS = ['actually', 'really', 'kind of', 'sort of', 'I mean', 'well', 'like', 'you know', 'perhaps', 'maybe']
+
+def _parse_insertions(result: str) -> list[str]:
+    words = [w.strip() for w in result.strip().split(',')]
+    words = [w for w in words if w and len(w) < 25]
+    return words[:10]
+
+@trace.traced('gemini.insertion_words', 'ai')
 def get_insertion_words(context: str = "") -> list[str]:
     """
     Get varied insertion words/phrases based on context.
     Returns list of words/phrases that could be inserted.
     """
+    def fetch():
+        return _parse_insertions(_generate_content(_INSERTIONS_PROMPT, 0.9).text)
+    
     try:
-        client = get_client()
-        prompt = f"""Give me 10 short filler words or phrases (1-3 words each) that someone might type while thinking, then delete.
-Examples: "actually", "really", "kind of", "sort of", "I mean", "well", "hmm", "like", "you know"
-Return ONLY a comma-separated list, nothing else."""
-        
-        response = client.models.generate_content(
-            model=DEFAULT_GEMINI_MODEL,
-            contents=prompt,
-            config=types.GenerateContentConfig(temperature=0.9)
-        )
-        
-        result = response.text.strip()
-        words = [w.strip() for w in result.split(',')]
-        words = [w for w in words if w and len(w) < 25]
-        return words[:10]
+        return _cached("insertion_words", context, fetch)
     
     except Exception as e:
         # fallback to varied list if API fails
-        print(f"// gemini error getting insertions: {e}")
-        return ['actually', 'really', 'kind of', 'sort of', 'I mean', 'well', 'like', 'you know', 'perhaps', 'maybe']
+        _report("getting insertions", e)
+        return list(_FALLBACK_INSERTIONS)
+
+@trace.traced_async('gemini.insertion_words', 'ai')
+async def get_insertion_words_async(context: str = "") -> list[str]:
+    """get_insertion_words() on the asyncio API."""
+    cache = ai_cache.get_cache()
+    try:
+        words = cache.get(DEFAULT_GEMINI_MODEL, "insertion_words", context)
+        if words is None:
+            words = _parse_insertions((await _generate_content_async(_INSERTIONS_PROMPT, 0.9)).text)
+            if words:
+                cache.put(DEFAULT_GEMINI_MODEL, "insertion_words", context, words)
+        return words
+    
+    except Exception as e:
+        _report("getting insertions", e)
+        return list(_FALLBACK_INSERTIONS)
+
+def _split_cached(func: str, items: list[str], key=None) -> tuple[dict, list[str]]:
+    """Look items up in the cache: ({item: cached result}, [items not cached]), without duplicates."""
+    cache = ai_cache.get_cache()
+    results = {}
+    missing = []
+    for item in dict.fromkeys(items):
+        cached = cache.get(DEFAULT_GEMINI_MODEL, func, key(item) if key else item)
+        if cached is not None:
+            results[item] = cached
+        else:
+            missing.append(item)
+    return results, missing
+
+def _synonyms_prompt(chunk: list[str], count: int) -> str:
+    return f"""For each word below, give {count} alternative words or synonyms with similar meaning.
+Answer with one entry per input id. Synonyms must be single words.
+
+Words: {_numbered(chunk)}"""
+
+def _store_synonyms(items: list, chunk: list[str], count: int, results: dict):
+    """Take the synonyms out of a batch answer into results (and the cache)."""
+    cache = ai_cache.get_cache()
+    for item in items:
+        idx = item.get("id")
+        if not isinstance(idx, int) or not 0 <= idx < len(chunk):
+            continue
+        synonyms = _clean_synonyms(item.get("synonyms") or [], count)
+        if synonyms:
+            word = chunk[idx]
+            results[word] = synonyms
+            cache.put(DEFAULT_GEMINI_MODEL, f"similar_words:{count}", word.lower(), synonyms)
+
+@trace.traced('gemini.similar_words_batch', 'ai')
+def get_similar_words_batch(words: list[str], count: int = 5) -> dict[str, list[str]]:
+    """
+    Get synonyms for many words in as few requests as possible.
+    Returns {word: synonyms}; words that failed are left out.
+    """
+    results, missing = _split_cached(f"similar_words:{count}", words, str.lower)
+    for i in range(0, len(missing), BATCH_WORDS):
+        chunk = missing[i:i + BATCH_WORDS]
+        try:
+            _store_synonyms(_generate_json(_synonyms_prompt(chunk, count), _SYNONYMS_SCHEMA, 0.7), chunk, count, results)
+        except Exception as e:
+            _report("getting synonyms", e)
+    
+    return results
+
+@trace.traced_async('gemini.similar_words_batch', 'ai')
+async def get_similar_words_batch_async(words: list[str], count: int = 5) -> dict[str, list[str]]:
+    """get_similar_words_batch() on the asyncio API."""
+    results, missing = _split_cached(f"similar_words:{count}", words, str.lower)
+    for i in range(0, len(missing), BATCH_WORDS):
+        chunk = missing[i:i + BATCH_WORDS]
+        try:
+            items = await _generate_json_async(_synonyms_prompt(chunk, count), _SYNONYMS_SCHEMA, 0.7)
+            _store_synonyms(items, chunk, count, results)
+        except Exception as e:
+            _report("getting synonyms", e)
+    
+    return results
+
+def _rephrase_prompt(chunk: list[str]) -> str:
+    return f"""Rephrase each text below to have the same meaning but different wording.
+Keep it natural and human-like. Answer with one entry per input id.
+
+Texts: {_numbered(chunk)}"""
+
+def _store_rephrasings(items: list, chunk: list[str], results: dict):
+    """Take the rephrasings out of a batch answer into results (and the cache)."""
+    cache = ai_cache.get_cache()
+    for item in items:
+        idx = item.get("id")
+        if not isinstance(idx, int) or not 0 <= idx < len(chunk):
+            continue
+        rephrased = item.get("rephrased")
+        rephrased = _clean_rephrased(rephrased) if isinstance(rephrased, str) else ""
+        if rephrased:
+            sentence = chunk[idx]
+            results[sentence] = rephrased
+            cache.put(DEFAULT_GEMINI_MODEL, "rephrase", sentence, rephrased)
+
+@trace.traced('gemini.rephrase_batch', 'ai')
+def rephrase_sentences_batch(sentences: list[str]) -> dict[str, str]:
+    """
+    Rephrase many sentences in as few requests as possible.
+    Returns {sentence: rephrased}; sentences that failed are left out.
+    """
+    results, missing = _split_cached("rephrase", sentences)
+    for i in range(0, len(missing), BATCH_SENTENCES):
+        chunk = missing[i:i + BATCH_SENTENCES]
+        try:
+            _store_rephrasings(_generate_json(_rephrase_prompt(chunk), _REPHRASE_SCHEMA, 0.8), chunk, results)
+        except Exception as e:
+            _report("rephrasing", e)
+    
+    return results
+
+@trace.traced_async('gemini.rephrase_batch', 'ai')
+async def rephrase_sentences_batch_async(sentences: list[str]) -> dict[str, str]:
+    """rephrase_sentences_batch() on the asyncio API."""
+    results, missing = _split_cached("rephrase", sentences)
+    for i in range(0, len(missing), BATCH_SENTENCES):
+        chunk = missing[i:i + BATCH_SENTENCES]
+        try:
+            items = await _generate_json_async(_rephrase_prompt(chunk), _REPHRASE_SCHEMA, 0.8)
+            _store_rephrasings(items, chunk, results)
+        except Exception as e:
+            _report("rephrasing", e)
+    
+    return results
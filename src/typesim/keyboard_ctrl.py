@@ -1,61 +1,73 @@
 """
-Keyboard control using pynput.
-Handles actual keypress simulation.
+Keyboard control.
+Handles actual keypress simulation through the active output sink
+(pynput by default, see sinks.py).
 """
 
-from pynput import keyboard
-from pynput.keyboard import Key, Controller
-import time
+from . import shortcuts
+from . import sinks
 
-# global controller instance
-_kb_controller = None
+# global output sink, created from the config on first use
+_sink = None
+
+def get_sink() -> sinks.Sink:
+    """Get or create the output sink named by the `output_sink` setting."""
+    global _sink
+    if _sink is None:
+        from . import config
+        _sink = sinks.create_sink(config.get_settings().output_sink)
+    return _sink
+
+def set_sink(sink: sinks.Sink | None):
+    """Replace the output sink (None = recreate from config on next use)."""
+    global _sink
+    if _sink is not None and _sink is not sink:
+        _sink.close()
+    _sink = sink
 
 def get_controller():
-    """Get or create keyboard controller."""
-    global _kb_controller
-    if _kb_controller is None:
-        _kb_controller = Controller()
-    return _kb_controller
+    """Get the pynput keyboard controller (switches to the pynput sink)."""
+    sink = get_sink()
+    if not isinstance(sink, sinks.PynputSink):
+        sink = sinks.PynputSink()
+        set_sink(sink)
+    return sink.controller
 
 def type_char(char: str):
     """Type a single character."""
-    ctrl = get_controller()
-    ctrl.type(char)
+    get_sink().type_text(char)
 
-def press_backspace(count: int = 1):
-    """Press backspace N times."""
-    ctrl = get_controller()
-    for _ in range(count):
-        ctrl.press(Key.backspace)
-        ctrl.release(Key.backspace)
-        time.sleep(0.01)  # small delay between backspaces
+def press_backspace(count: int = 1, interval: float = 0.01):
+    """Press backspace N times, `interval` seconds apart (0 = as fast as possible)."""
+    get_sink().backspace(count, interval)
+
+def press_word_backspace(count: int = 1, interval: float = 0.01):
+    """Delete N words with Ctrl+Backspace."""
+    get_sink().word_backspace(count, interval)
 
 def press_enter():
     """Press Enter key."""
-    ctrl = get_controller()
-    ctrl.press(Key.enter)
-    ctrl.release(Key.enter)
+    get_sink().press_enter()
 
 def press_space():
     """Press Space key."""
-    ctrl = get_controller()
-    ctrl.press(Key.space)
-    ctrl.release(Key.space)
+    get_sink().press_space()
 
-# global flag for emergency stop
-_stop_requested = False
+# emergency stop shares the control token with the shortcuts handler
 
 def set_stop_flag(value: bool):
     """Set the emergency stop flag."""
-    global _stop_requested
-    _stop_requested = value
+    shortcuts.get_token().set_stopped(value)
 
 def is_stopped() -> bool:
     """Check if stop was requested."""
-    return _stop_requested
+    return shortcuts.is_stopped()
 
 def setup_escape_listener():
     """Set up listener for Esc key to stop typing."""
+    from pynput import keyboard
+    from pynput.keyboard import Key
+    
     def on_press(key):
         try:
             if key == Key.esc:
@@ -0,0 +1,73 @@
+"""
+Keyboard layouts for realistic typos.
+Each layout is compiled once at import into a table indexed by code point,
+so finding the keys next to a char is one list index.
+"""
+
+# rows of keys (unshifted, shifted) from the number row down, with where each
+# row starts in key widths - staggered like a real keyboard
+_ANSI = (0.0, 1.5, 1.75, 2.25)
+_ISO = (0.0, 1.5, 1.75, 1.25)  # extra key left of the bottom row
+
+LAYOUTS = {
+    'qwerty': (_ANSI, (
+        ("`1234567890-=", "~!@#$%^&*()_+"),
+        ("qwertyuiop[]\\", "QWERTYUIOP{}|"),
+        ("asdfghjkl;'", 'ASDFGHJKL:"'),
+        ("zxcvbnm,./", "ZXCVBNM<>?"),
+    )),
+    'qwertz': (_ISO, (
+        ("^1234567890ß´", "°!\"§$%&/()=?`"),
+        ("qwertzuiopü+", "QWERTZUIOPÜ*"),
+        ("asdfghjklöä#", "ASDFGHJKLÖÄ'"),
+        ("<yxcvbnm,.-", ">YXCVBNM;:_"),
+    )),
+    'azerty': (_ISO, (
+        ("²&é\"'(-è_çà)=", "²1234567890°+"),
+        ("azertyuiop^$", "AZERTYUIOP¨£"),
+        ("qsdfghjklmù*", "QSDFGHJKLM%µ"),
+        ("<wxcvbn,;:!", ">WXCVBN?./§"),
+    )),
+    'dvorak': (_ANSI, (
+        ("`1234567890[]", "~!@#$%^&*(){}"),
+        ("',.pyfgcrl/=\\", "\"<>PYFGCRL?+|"),
+        ("aoeuidhtns-", "AOEUIDHTNS_"),
+        (";qjkxbmwvz", ":QJKXBMWVZ"),
+    )),
+}
+
+DEFAULT_LAYOUT = 'qwerty'
+
+def compile_layout(offsets: tuple, rows: tuple) -> list:
+    """
+    Build the neighbor table: table[ord(char)] is a tuple of the keys next to
+    char (same row, or the row above/below less than a key width away), or ()
+    for chars not on the layout. Shifted chars get shifted neighbors.
+    """
+    keys = []  # (x, row, plain, shifted)
+    for row, ((plain, shifted), start) in enumerate(zip(rows, offsets)):
+        if len(plain) != len(shifted):
+            raise ValueError(f"row {row} has {len(plain)} keys but {len(shifted)} shifted keys")
+        keys.extend((start + col, row, p, s) for col, (p, s) in enumerate(zip(plain, shifted)))
+
+    table = [()] * (max(ord(c) for _, _, p, s in keys for c in (p, s)) + 1)
+    for x, row, plain, shifted in keys:
+        near = [
+            k for k in keys
+            if k[2] != plain and (
+                (k[1] == row and abs(k[0] - x) == 1)
+                or (abs(k[1] - row) == 1 and abs(k[0] - x) < 1)
+            )
+        ]
+        # a char that's on two keys (like ² on azerty) keeps the first
+        if not table[ord(plain)]:
+            table[ord(plain)] = tuple(k[2] for k in near)
+        if shifted != plain and not table[ord(shifted)]:
+            table[ord(shifted)] = tuple(k[3] for k in near)
+    return table
+
+TABLES = {name: compile_layout(offsets, rows) for name, (offsets, rows) in LAYOUTS.items()}
+
+def get_table(name: str) -> list:
+    """Neighbor table of a layout (unknown names get qwerty)."""
+    return TABLES.get(name) or TABLES[DEFAULT_LAYOUT]
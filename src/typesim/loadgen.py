@@ -0,0 +1,249 @@
+"""
+Load generator: many independent typing sessions at once, for driving
+text-input UIs under load.
+
+Each session runs in its own worker process with its own seed, preset and
+X display (or target window), so sessions don't share a keyboard
+controller. Local Xvfb servers can be started for the run, so it needs no
+real display. Or all sessions run as tasks on one event loop in this
+process (run_async), with a control server to pause or stop them.
+"""
+
+import multiprocessing
+import os
+import shutil
+import signal
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from . import config
+from . import progress
+from . import randomness
+from . import shortcuts
+from . import sinks
+from . import textprep
+from . import typing_engine
+
+# how long to wait for an Xvfb server to come up
+XVFB_TIMEOUT_S = 5.0
+
+def free_display(start: int = 99) -> int:
+    """First X display number from start with no server (no lock file or socket)."""
+    n = start
+    while os.path.exists(f"/tmp/.X{n}-lock") or os.path.exists(f"/tmp/.X11-unix/X{n}"):
+        n += 1
+    return n
+
+def start_xvfb(display: int, screen: str = "1280x800x24") -> subprocess.Popen:
+    """Start an Xvfb server on :display and wait until it accepts connections."""
+    if shutil.which("Xvfb") is None:
+        raise RuntimeError("Xvfb not found in PATH")
+    proc = subprocess.Popen(
+        ["Xvfb", f":{display}", "-screen", "0", screen, "-nolisten", "tcp"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + XVFB_TIMEOUT_S
+    while not os.path.exists(f"/tmp/.X11-unix/X{display}"):
+        if proc.poll() is not None:
+            raise RuntimeError(f"Xvfb :{display} exited with status {proc.returncode}")
+        if time.monotonic() > deadline:
+            proc.terminate()
+            raise RuntimeError(f"Xvfb :{display} didn't start in {XVFB_TIMEOUT_S:.0f}s")
+        time.sleep(0.05)
+    return proc
+
+def start_app(command: str, display: str) -> subprocess.Popen:
+    """Start the app under test on a display (it should take keyboard focus)."""
+    env = dict(os.environ, DISPLAY=display)
+    return subprocess.Popen(command, shell=True, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def make_sessions(count: int, settings: list[config.Settings], presets: list[str | None],
+                  displays: list[str | None], windows: list[str | None], seed: int | None) -> list[dict]:
+    """
+    Session specs for the workers. Settings, presets, displays and windows
+    are given per session in turn (a shorter list repeats).
+    Seeds are seed, seed+1, ... (random if seed is None).
+    """
+    base_seed = seed if seed is not None else randomness.SessionRandom().seed
+    sessions = []
+    for i in range(count):
+        sessions.append({
+            'name': f"s{i + 1}",
+            'settings': settings[i % len(settings)].as_dict(),  # Settings is frozen, send it as a dict
+            'preset': presets[i % len(presets)],
+            'display': displays[i % len(displays)],
+            'window': windows[i % len(windows)],
+            'seed': (base_seed + i) & 0xFFFFFFFF,
+        })
+    return sessions
+
+def _open_sink(session: dict, settings: config.Settings, display: bool = False) -> tuple[dict, sinks.Sink | None]:
+    """
+    A session's result dict and sink (None, with the error in the result, if it can't be created).
+    With display, the session's display goes to the xdotool sink, or to DISPLAY for the other sinks.
+    """
+    result = {key: session[key] for key in ('name', 'preset', 'display', 'window', 'seed')}
+    options = {'window': session['window']} if session['window'] else {}
+    if display and session['display']:
+        if settings.output_sink == 'xdotool':
+            options['display'] = session['display']
+        else:
+            os.environ['DISPLAY'] = session['display']  # one per loop (run_load refuses several with pynput)
+    try:
+        return result, sinks.create_sink(settings.output_sink, **options)
+    except (OSError, ValueError, RuntimeError) as e:
+        result['error'] = str(e)
+        return result, None
+
+def _report(result: dict, tracker: progress.Progress, elapsed: float, stats: dict | None) -> dict:
+    result.update({
+        'chars': tracker.position,
+        'keystrokes': tracker.keystrokes,
+        'elapsed_s': elapsed,
+        'keys_per_s': tracker.keystrokes / elapsed if elapsed > 0 else 0.0,
+        'p99_us': stats['p99_us'] if stats else 0.0,
+    })
+    return result
+
+def run_session(session: dict, text: str) -> dict:
+    """Worker: type text in one session and report its throughput."""
+    if session['display']:
+        os.environ['DISPLAY'] = session['display']  # xdotool and pynput both use it
+    settings = config.Settings(session['settings'])
+    result, sink = _open_sink(session, settings)
+    if sink is None:
+        return result
+
+    shortcuts.reset()
+    token = shortcuts.get_token()
+    shortcuts.set_speed_multiplier(settings.speed_multiplier)
+    config.publish_settings(settings)
+    tracker = progress.Progress(len(textprep.prepare_settings(text, settings)))  # counts what gets typed
+    started = time.perf_counter()
+    stats = None
+    try:
+        clock = typing_engine.type_text_realistic(text, settings, sink, randomness.SessionRandom(session['seed']), tracker)
+        stats = clock.stats()
+    except KeyboardInterrupt:
+        token.request_stop()
+        result['error'] = "interrupted"
+    except (OSError, RuntimeError) as e:
+        result['error'] = str(e)
+    finally:
+        sink.close()
+    return _report(result, tracker, time.perf_counter() - started, stats)
+
+async def run_session_async(session: dict, text: str, token: shortcuts.ControlToken) -> dict:
+    """run_session() as a task on a shared event loop (its display goes to the xdotool sink)."""
+    from . import async_engine
+    settings = config.Settings(session['settings'])
+    result, sink = _open_sink(session, settings, display=True)
+    if sink is None:
+        return result
+
+    token.set_speed(settings.speed_multiplier)
+    tracker = progress.Progress(len(textprep.prepare_settings(text, settings)))  # counts what gets typed
+    started = time.perf_counter()
+    stats = None
+    try:
+        clock = await async_engine.type_text_async(text, settings, sink, randomness.SessionRandom(session['seed']),
+                                                   tracker, token)
+        stats = clock.stats()
+        if token.is_stopped():
+            result['error'] = "stopped"
+    except (OSError, RuntimeError) as e:
+        result['error'] = str(e)
+    finally:
+        sink.close()
+    return _report(result, tracker, time.perf_counter() - started, stats)
+
+def run(sessions: list[dict], text: str, on_result=None) -> tuple[list[dict], float]:
+    """
+    Run sessions in parallel worker processes (one each).
+    on_result(result) is called as each one finishes.
+    Returns (results in session order, wall time in seconds).
+    """
+    results = {}
+    started = time.perf_counter()
+    # spawn: workers start clean, with no display connections or threads from this process
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(sessions), mp_context=ctx) as pool:
+        futures = {pool.submit(run_session, session, text): session['name'] for session in sessions}
+        pending = set(futures)
+        while pending:
+            try:
+                for future in as_completed(pending):
+                    pending.discard(future)
+                    results[futures[future]] = result = future.result()
+                    if on_result is not None:
+                        on_result(result)
+            except KeyboardInterrupt:
+                continue  # Ctrl+C reaches the workers too - collect what they typed
+    wall = time.perf_counter() - started
+    return [results[s['name']] for s in sessions], wall
+
+def run_async(sessions: list[dict], text: str, on_result=None, control_port: int | None = None,
+              on_listen=None) -> tuple[list[dict], float]:
+    """
+    Run all sessions as tasks on one event loop in this process.
+    With control_port, a control server (see async_engine.serve_control) takes
+    commands for the sessions by name; on_listen(host, port) is called once it's up.
+    Ctrl+C stops every session at its next keystroke.
+    Returns (results in session order, wall time in seconds).
+    """
+    import asyncio  # the process workers don't need it
+    return asyncio.run(_run_async(sessions, text, on_result, control_port, on_listen))
+
+async def _run_async(sessions: list[dict], text: str, on_result, control_port: int | None, on_listen):
+    import asyncio
+    from . import async_engine
+    tokens = {session['name']: shortcuts.ControlToken() for session in sessions}
+    loop = asyncio.get_running_loop()
+
+    def stop_all():
+        for token in tokens.values():
+            token.request_stop()
+
+    loop.add_signal_handler(signal.SIGINT, stop_all)
+    server = None
+    if control_port is not None:
+        server = await async_engine.serve_control(tokens, port=control_port)
+        if on_listen is not None:
+            on_listen(*server.sockets[0].getsockname()[:2])
+
+    async def one(session: dict) -> dict:
+        result = await run_session_async(session, text, tokens[session['name']])
+        if on_result is not None:
+            on_result(result)
+        return result
+
+    started = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(one(session) for session in sessions))
+    finally:
+        loop.remove_signal_handler(signal.SIGINT)
+        if server is not None:
+            server.close()  # open connections are dropped when the loop ends
+    return results, time.perf_counter() - started
+
+def format_report(results: list[dict], wall: float) -> str:
+    """Per-session and aggregate throughput table."""
+    lines = [f"{'session':<8} {'display':<8} {'preset':<12} {'seed':>10} {'chars':>8} {'keys':>8} "
+             f"{'time':>8} {'keys/s':>8} {'p99 late':>9}"]
+    total_keys = 0
+    for r in results:
+        head = f"{r['name']:<8} {r['display'] or '-':<8} {r['preset'] or '-':<12} {r['seed']:>10}"
+        if 'keystrokes' not in r:
+            lines.append(f"{head}  error: {r['error']}")
+            continue
+        total_keys += r['keystrokes']
+        line = (f"{head} {r['chars']:>8} {r['keystrokes']:>8} {r['elapsed_s']:>7.1f}s "
+                f"{r['keys_per_s']:>8.1f} {r['p99_us'] / 1000:>7.2f}ms")
+        if 'error' in r:
+            line += f"  ({r['error']})"
+        lines.append(line)
+    ok = sum(1 for r in results if 'error' not in r)
+    lines.append(f"{ok}/{len(results)} sessions ok, {total_keys} keystrokes in {wall:.1f}s: "
+                 f"{total_keys / wall if wall > 0 else 0.0:.1f} keys/s aggregate")
+    return '\n'.join(lines)
@@ -0,0 +1,179 @@
+"""
+Background prefetch of AI suggestions ahead of the typing cursor.
+The engine reads results without blocking; anything not ready yet is a miss
+and the engine falls back to its local behavior.
+
+Text is scanned in blocks and each block goes out as one batched request
+for its words and one for its sentences.
+"""
+
+import random
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from . import gemini_helper
+from . import resilience
+from . import textindex
+
+# chars that end a word, same as the typing engine
+_WORD_END = re.compile(r'[ \n\t]')
+
+class Prefetcher:
+    """
+    Requests synonyms and rephrasings for text ahead of the planner on a thread pool.
+    Rephrase spans are picked here (with span_picker) so the request can go out early.
+    A new block is scanned once less than half of `lookahead` is left ahead of the cursor.
+    """
+
+    def __init__(self, text, span_picker, lookahead: int = 4000, workers: int = 4, rng=None):
+        self.text = text
+        self.index = textindex.index_of(text)
+        self.lookahead = lookahead
+        self._span_picker = span_picker  # (text, index, start, end, rng) -> (char_start, span) | None
+        self._rng = rng if rng is not None else random.Random()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="typesim-prefetch")
+        self._stop = threading.Event()  # set by close() to end waits for slots and retries
+        self._synonyms = {}  # word -> Future[{word: synonyms}] of its batch
+        self._rephrasings = {}  # (sentence_start, sentence_end) -> (char_start, span, Future[{span: rephrased}])
+        self._insertions = self._fetch_insertions()
+        self._scanned = 0  # text is scanned up to here
+        self.advance(0)
+
+    def advance(self, position: int):
+        """Request suggestions for text up to `lookahead` chars past position."""
+        text, index = self.text, self.index
+        len(text)  # a streaming text reads (and indexes) more as needed
+        if self._scanned >= index.length or self._scanned - position >= self.lookahead // 2:
+            return  # still far enough ahead
+        limit = min(index.length, position + self.lookahead)
+        scanned = self._scanned
+        if limit < index.length:
+            # stop at a word end so words aren't cut in half
+            m = None
+            for m in _WORD_END.finditer(text[scanned:limit]):
+                pass
+            limit = scanned + m.start() if m else scanned
+        if limit <= scanned:
+            return
+
+        # words as the engine sees them: from the word start up to a word end
+        words = []
+        for m in _WORD_END.finditer(text[scanned:limit + 1]):
+            end = scanned + m.start()
+            word = text[index.word_start(index.start, end):end]
+            if len(word) > 3 and word not in self._synonyms:
+                self._synonyms[word] = None
+                words.append(word)
+        if words:
+            future = self._fetch_synonyms(words)
+            for word in words:
+                self._synonyms[word] = future
+
+        # complete sentences, with the same boundaries the engine looks up
+        spans = []
+        for start, end in index.sentences_ending(scanned, limit):
+            span = self._span_picker(text, index, start, end, self._rng)
+            if span is not None:
+                spans.append(((start, end), span))
+        if spans:
+            future = self._fetch_rephrasings([to_rephrase for _, (_, to_rephrase) in spans])
+            for key, (char_start, to_rephrase) in spans:
+                self._rephrasings[key] = (char_start, to_rephrase, future)
+
+        # forget sentences well behind the cursor so long runs don't pile them up
+        rephrasings = self._rephrasings
+        while rephrasings:
+            key = next(iter(rephrasings))
+            if key[1] >= position - self.lookahead:
+                break
+            del rephrasings[key]
+
+        self._scanned = limit
+
+    def _submit(self, fn, *args) -> Future:
+        """Run fn on the pool, stopping its guarded calls when the prefetcher closes."""
+        def run():
+            with resilience.stop_on(self._stop):
+                return fn(*args)
+        return self._pool.submit(run)
+
+    def _fetch_synonyms(self, words: list[str]) -> Future:
+        """Start one batched synonyms request -> Future[{word: synonyms}]."""
+        return self._submit(gemini_helper.get_similar_words_batch, words, 3)
+
+    def _fetch_rephrasings(self, spans: list[str]) -> Future:
+        """Start one batched rephrase request -> Future[{span: rephrased}]."""
+        return self._submit(gemini_helper.rephrase_sentences_batch, spans)
+
+    def _fetch_insertions(self) -> Future:
+        """Start the filler words request -> Future[list[str]]."""
+        return self._submit(gemini_helper.get_insertion_words)
+
+    def similar_words(self, word: str) -> list[str] | None:
+        """Get prefetched synonyms, or None if not ready."""
+        future = self._synonyms.get(word)
+        if future is None or not future.done():
+            return None
+        return future.result().get(word)
+
+    def rephrasing(self, start: int, end: int) -> tuple[int, str, str] | None:
+        """
+        Get a prefetched rephrasing for the sentence at (start, end).
+        Returns (char_start, original_span, rephrased), or None if not ready.
+        """
+        entry = self._rephrasings.get((start, end))
+        if entry is None or not entry[2].done():
+            return None
+        char_start, to_rephrase, future = entry
+        rephrased = future.result().get(to_rephrase)
+        if rephrased is None:
+            return None
+        return char_start, to_rephrase, rephrased
+
+    def insertion_words(self) -> list[str] | None:
+        """Get prefetched filler words, or None if not ready."""
+        if not self._insertions.done():
+            return None
+        return self._insertions.result()
+
+    def close(self):
+        """
+        Stop prefetching: queued requests are dropped and workers waiting for
+        a request slot or a retry give up, so exit only waits for requests
+        already sent (each bounded by ai_timeout_ms).
+        """
+        self._stop.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+class AsyncPrefetcher(Prefetcher):
+    """
+    Prefetcher for the asyncio engine: requests run as tasks on the running
+    event loop (so it must be created inside it) instead of on a thread pool.
+    Tasks have done()/result() like futures, so lookups work the same.
+    """
+
+    def __init__(self, text, span_picker, lookahead: int = 4000, rng=None):
+        self._tasks = set()
+        super().__init__(text, span_picker, lookahead, rng=rng)  # its thread pool is never used, so no threads start
+
+    def _start(self, coro):
+        import asyncio  # dry runs load this module too - keep them quick
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _fetch_synonyms(self, words: list[str]):
+        return self._start(gemini_helper.get_similar_words_batch_async(words, 3))
+
+    def _fetch_rephrasings(self, spans: list[str]):
+        return self._start(gemini_helper.rephrase_sentences_batch_async(spans))
+
+    def _fetch_insertions(self):
+        return self._start(gemini_helper.get_insertion_words_async())
+
+    def close(self):
+        """Cancel requests still in flight."""
+        for task in list(self._tasks):
+            task.cancel()
+        super().close()
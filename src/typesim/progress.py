@@ -0,0 +1,36 @@
+"""
+Typing progress shared between the executor and whatever displays it.
+The executor only writes a couple of ints; readers poll at their own rate.
+"""
+
+def format_duration(seconds: float) -> str:
+    """Format a duration like 1h 05m, 12m 30s or 45s."""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {secs:02d}s"
+    return f"{secs}s"
+
+class Progress:
+    """Position and keystroke counts of a running session."""
+
+    def __init__(self, total: int):
+        self.total = total  # chars in the text
+        self.position = 0  # chars of the text typed so far
+        self.keystrokes = 0  # keys sent so far, typos and edits included
+
+    def update(self, position: int, keystrokes: int):
+        self.position = position
+        self.keystrokes = keystrokes
+
+    @property
+    def fraction(self) -> float:
+        return self.position / self.total if self.total else 1.0
+
+    @property
+    def overhead(self) -> float:
+        """Keystrokes per char typed (1.0 = no typos or edits)."""
+        return self.keystrokes / self.position if self.position else 0.0
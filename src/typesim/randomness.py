@@ -0,0 +1,99 @@
+"""
+Seeded random streams for a typing session.
+Every kind of decision draws from its own stream, so changing one
+probability doesn't reshuffle the others, and the same seed with the
+same settings plans the same keystrokes.
+
+Streams sample in blocks (with NumPy when installed) and hand out
+values from a buffer, so the planner doesn't pay for an RNG call per draw.
+"""
+
+import hashlib
+import random
+
+# values sampled per refill
+BLOCK_SIZE = 4096
+
+# stream name -> what draws from it
+STREAMS = {
+    'delays': "keystroke delays and pauses",
+    'typos': "typo checks and the neighbor key hit",
+    'edits': "whether to go back and edit after a word",
+    'edit_actions': "where to edit and what to do there",
+    'rephrases': "whether an edit rephrases a sentence, and which one",
+    'spans': "which part of a sentence gets rephrased",
+}
+
+def derive_seed(seed: int, name: str) -> int:
+    """Derive the seed of a named substream from the session seed."""
+    digest = hashlib.sha256(f"{seed}/{name}".encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+def _numpy_sampler(seed: int):
+    """Block sampler backed by a NumPy Generator, or None if NumPy isn't installed."""
+    try:
+        import numpy  # optional - pip install typesim[fast]
+    except ImportError:
+        return None
+    generator = numpy.random.default_rng(seed)
+    return lambda n: generator.random(n).tolist()
+
+def _python_sampler(seed: int):
+    """Block sampler backed by random.Random."""
+    rnd = random.Random(seed).random
+    return lambda n: [rnd() for _ in range(n)]
+
+class BufferedRandom:
+    """
+    Random stream that samples uniforms BLOCK_SIZE at a time and serves
+    draws from the buffer, refilling lazily when it runs out.
+    Covers the parts of the random.Random API the engine uses.
+    Delays are drawn unscaled (the scheduler applies the speed multiplier),
+    so buffered values stay valid when the speed changes.
+    """
+
+    def __init__(self, seed: int, block_size: int = BLOCK_SIZE):
+        self.block_size = block_size
+        self._sample = _numpy_sampler(seed) or _python_sampler(seed)
+        self._next = iter(()).__next__
+
+    def _refill(self) -> float:
+        self._next = iter(self._sample(self.block_size)).__next__
+        return self._next()
+
+    def random(self) -> float:
+        """Uniform float in [0, 1)."""
+        try:
+            return self._next()
+        except StopIteration:
+            return self._refill()
+
+    def uniform(self, a: float, b: float) -> float:
+        """Uniform float between a and b."""
+        try:
+            u = self._next()
+        except StopIteration:
+            u = self._refill()
+        return a + (b - a) * u
+
+    def randint(self, a: int, b: int) -> int:
+        """Random int in [a, b], both included."""
+        return a + int(self.random() * (b - a + 1))
+
+    def choice(self, seq):
+        """Random element of a non-empty sequence."""
+        return seq[int(self.random() * len(seq))]
+
+class SessionRandom:
+    """
+    Random streams owned by one typing session, one BufferedRandom per name
+    in STREAMS (e.g. `rng.delays.uniform(...)`).
+    Without a seed a fresh one is picked, so any run can be replayed from `seed`.
+    """
+
+    def __init__(self, seed: int | None = None):
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+        self.seed = seed
+        for name in STREAMS:
+            setattr(self, name, BufferedRandom(derive_seed(seed, name)))
@@ -0,0 +1,281 @@
+"""
+Guards for flaky network calls: rate limiting, retries with jittered
+backoff and a circuit breaker, so a bad network costs one timeout
+instead of one per word.
+"""
+
+import contextlib
+import random
+import threading
+import time
+
+# HTTP status codes worth retrying
+RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling while the circuit breaker is open."""
+
+class RateLimitedError(Exception):
+    """Raised when no request slot frees up before the call's deadline."""
+
+class StoppedError(Exception):
+    """Raised when a guarded call is told to stop (see stop_on) while it waits."""
+
+_local = threading.local()
+
+@contextlib.contextmanager
+def stop_on(event: threading.Event):
+    """
+    Make guarded calls on this thread give up once `event` is set: waits for
+    a request slot or a retry end early with StoppedError, and no new attempt
+    starts. A request already sent still runs to its own timeout.
+    """
+    outer = getattr(_local, 'stop', None)
+    _local.stop = event
+    try:
+        yield event
+    finally:
+        _local.stop = outer
+
+def _stop_event() -> threading.Event | None:
+    return getattr(_local, 'stop', None)
+
+def _sleep(seconds: float, stop: threading.Event | None):
+    """Sleep, ending early with StoppedError if stop gets set."""
+    if stop is None:
+        time.sleep(seconds)
+    elif stop.wait(seconds):
+        raise StoppedError("stopped while waiting")
+
+class TokenBucket:
+    """Token-bucket rate limiter (thread-safe)."""
+
+    def __init__(self, rate: float, burst: int, clock=time.monotonic):
+        self.rate = rate  # tokens per second (0 = unlimited)
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long to wait for it (0 if available now)."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def _take(self, timeout: float | None) -> float | None:
+        """Reserve a token, returning the wait for it, or None (without taking one) if it's over timeout."""
+        if self.rate <= 0:
+            return 0.0
+        wait = self._reserve()
+        if timeout is not None and wait > timeout:
+            with self._lock:
+                self._tokens += 1  # give it back
+            return None
+        return wait
+
+    def acquire(self, timeout: float | None = None, stop: threading.Event | None = None) -> bool:
+        """
+        Wait for a token. Returns False (without taking one) if it'd take longer than timeout.
+        Raises StoppedError (and gives the token back) if stop gets set while waiting.
+        """
+        wait = self._take(timeout)
+        if wait is None:
+            return False
+        if wait:
+            try:
+                _sleep(wait, stop)
+            except StoppedError:
+                with self._lock:
+                    self._tokens += 1
+                raise
+        return True
+
+    async def acquire_async(self, timeout: float | None = None) -> bool:
+        """acquire() for coroutines."""
+        import asyncio  # not at module level, so sync AI calls (and dry runs) skip it
+        wait = self._take(timeout)
+        if wait is None:
+            return False
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+
+class CircuitBreaker:
+    """
+    Stops calls for a cooldown after repeated failures.
+    After the cooldown one trial call is let through (half-open);
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, threshold: int = 3, cooldown: float = 60.0, clock=time.monotonic, on_open=None):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._on_open = on_open  # called with the cooldown when the circuit opens
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None and self._clock() - self._opened_at < self.cooldown
+
+    def allow(self) -> bool:
+        """Check if a call may go out now."""
+        return self.admit() is not None
+
+    def admit(self) -> bool | None:
+        """
+        Let a call go out if possible: None if not, else whether it's the
+        half-open trial call. A trial that ends without record_success() or
+        record_failure() must be handed back with release_trial().
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if self._clock() - self._opened_at < self.cooldown or self._trial:
+                return None
+            self._trial = True  # half-open: let one call try
+            return True
+
+    def release_trial(self):
+        """Give back the trial call without a result (it was cancelled), so another can try."""
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self, weight: int = 1):
+        """Count a failure (a timeout can count as several)."""
+        opened = False
+        with self._lock:
+            self._failures += weight
+            if self._trial or self._failures >= self.threshold:
+                opened = self._opened_at is None or self._trial
+                self._opened_at = self._clock()
+                self._trial = False
+        if opened and self._on_open is not None:
+            self._on_open(self.cooldown)
+
+def is_timeout(error: Exception) -> bool:
+    """Check if an error is a timeout (works for httpx/requests/builtin errors)."""
+    return isinstance(error, TimeoutError) or 'Timeout' in type(error).__name__
+
+def is_retryable(error: Exception) -> bool:
+    """Check if an error is transient and worth retrying."""
+    if getattr(error, 'code', None) in RETRYABLE_CODES:
+        return True
+    name = type(error).__name__
+    return any(part in name for part in ('Connect', 'Network', 'RemoteProtocol'))
+
+class Guard:
+    """Runs calls through a rate limiter, retries and a circuit breaker."""
+
+    def __init__(self, bucket: TokenBucket, breaker: CircuitBreaker, max_retries: int = 2,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0, deadline: float = 20.0):
+        self.bucket = bucket
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline  # max seconds for one call including retries
+
+    def call(self, fn, *args, **kwargs):
+        """Call fn with rate limiting, retries and the breaker."""
+        stop = _stop_event()
+        give_up_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            if stop is not None and stop.is_set():
+                raise StoppedError("stopped before the call")
+            self._check_breaker()
+            if not self.bucket.acquire(timeout=give_up_at - time.monotonic(), stop=stop):
+                raise RateLimitedError("no request slot before deadline")
+            trial = self._admit()
+
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, give_up_at)
+                if delay is None:
+                    raise
+                _sleep(delay, stop)
+                attempt += 1
+                continue
+            except BaseException:
+                # interrupted - neither a success nor a failure
+                if trial:
+                    self.breaker.release_trial()
+                raise
+
+            self.breaker.record_success()
+            return result
+
+    async def call_async(self, fn, *args, **kwargs):
+        """call() for a coroutine function - waits for slots and backoff without blocking the event loop."""
+        import asyncio
+        give_up_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            self._check_breaker()
+            if not await self.bucket.acquire_async(timeout=give_up_at - time.monotonic()):
+                raise RateLimitedError("no request slot before deadline")
+            trial = self._admit()
+
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, give_up_at)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # cancelled (prefetcher closed) - neither a success nor a failure
+                if trial:
+                    self.breaker.release_trial()
+                raise
+
+            self.breaker.record_success()
+            return result
+
+    def _check_breaker(self):
+        """Fail fast while the circuit is open, before waiting for a request slot."""
+        if self.breaker.is_open:
+            raise CircuitOpenError("ai calls paused after repeated failures")
+
+    def _admit(self) -> bool:
+        """Claim the breaker's go-ahead once a slot is held. Returns True for the half-open trial."""
+        trial = self.breaker.admit()
+        if trial is None:
+            raise CircuitOpenError("ai calls paused after repeated failures")
+        return trial
+
+    def _retry_delay(self, error: Exception, attempt: int, give_up_at: float) -> float | None:
+        """Record a failed attempt. Returns the backoff before the next one, or None to give up."""
+        if is_timeout(error):
+            # a slow network will just time out again - trip right away
+            self.breaker.record_failure(self.breaker.threshold)
+            return None
+        self.breaker.record_failure()
+        if not is_retryable(error) or attempt >= self.max_retries:
+            return None
+        # full jitter exponential backoff
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if time.monotonic() + delay >= give_up_at:
+            return None
+        return delay
@@ -0,0 +1,205 @@
+"""
+Drift-free keystroke timing.
+Sleeps until absolute deadlines so emit cost and sleep overshoot don't add up.
+"""
+
+import time
+from array import array
+
+# keep at most this many jitter samples for percentiles
+MAX_SAMPLES = 100_000
+
+class DeadlineScheduler:
+    """
+    Schedules delays against absolute deadlines on perf_counter_ns.
+    Each delay is added to the previous deadline (not to "now"), so time
+    spent emitting keys is taken out of the next sleep instead of piling up.
+
+    With a control token, sleeps are scaled by its speed multiplier and wake
+    immediately on pause, stop or a speed change.
+    """
+
+    def __init__(self, token=None, spin_us: int = 0, spin_below_ms: float = 50, max_lag_ms: int = 250):
+        self.token = token  # shortcuts.ControlToken or None
+        self.spin_ns = int(spin_us * 1000)  # busy-wait the last bit for precision
+        self.spin_below_s = spin_below_ms / 1000.0  # only spin for short (fast) delays
+        self.max_lag_ns = int(max_lag_ms * 1_000_000)  # resync instead of bursting
+        self._deadline = None
+
+        # jitter stats (how late we woke up vs the deadline)
+        self.count = 0
+        self.resyncs = 0
+        self.total_late_ns = 0
+        self.max_late_ns = 0
+        self._samples = array('q')
+
+    def resync(self):
+        """Forget the current deadline (after a pause or a long stall)."""
+        self._deadline = None
+
+    def sleep(self, seconds: float):
+        """
+        Sleep until the next deadline, `seconds` after the previous one.
+        `seconds` is divided by the token's speed multiplier.
+        """
+        token = self.token
+        speed = token.speed if token is not None else 1.0
+        if not self._schedule(seconds, speed):
+            return
+
+        spin_ns = self.spin_ns if seconds / speed < self.spin_below_s else 0
+        while self._wait_until(self._deadline, spin_ns):
+            # woken early by a state change
+            if token.is_stopped():
+                self._deadline = None
+                return
+            remaining = max(0, self._deadline - time.perf_counter_ns())
+            if token.is_paused():
+                if not token.wait_resumed():
+                    self._deadline = None
+                    return
+            speed = self._rescale(remaining, speed)
+
+        self._record(time.perf_counter_ns() - self._deadline)
+
+    def _schedule(self, seconds: float, speed: float) -> bool:
+        """Move the deadline on by the delay. Returns False if it resynced instead (nothing to wait for)."""
+        now = time.perf_counter_ns()
+        if self._deadline is None:
+            self._deadline = now
+        self._deadline += int(seconds * 1_000_000_000 / speed)
+
+        if now - self._deadline > self.max_lag_ns:
+            # way behind (slow emit, stall) - don't catch up in a burst
+            self._deadline = now
+            self.resyncs += 1
+            return False
+        return True
+
+    def _rescale(self, remaining: int, speed: float) -> float:
+        """Rescale what's left of the delay to the token's new speed. Returns the new speed."""
+        new_speed = self.token.speed
+        self._deadline = time.perf_counter_ns() + int(remaining * speed / new_speed)
+        return new_speed
+
+    def _wait_until(self, deadline: int, spin_ns: int) -> bool:
+        """
+        Coarse sleep, then spin for the last spin_ns.
+        Returns True if interrupted by a token state change.
+        """
+        token = self.token
+        version = token.version if token is not None else 0
+        remaining = deadline - time.perf_counter_ns()
+        if remaining > spin_ns:
+            timeout = (remaining - spin_ns) / 1_000_000_000
+            if token is not None:
+                if token.wait_for_change(version, timeout):
+                    return True
+            else:
+                time.sleep(timeout)
+        if spin_ns:
+            while time.perf_counter_ns() < deadline:
+                pass
+        return False
+
+    def _record(self, late_ns: int):
+        """Record how late a wakeup was."""
+        if late_ns < 0:
+            late_ns = 0
+        self.count += 1
+        self.total_late_ns += late_ns
+        if late_ns > self.max_late_ns:
+            self.max_late_ns = late_ns
+        if len(self._samples) < MAX_SAMPLES:
+            self._samples.append(late_ns)
+
+    def stats(self) -> dict:
+        """Get measured jitter in microseconds."""
+        samples = sorted(self._samples)
+
+        def pct(p: float) -> float:
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(p * len(samples)))] / 1000.0
+
+        return {
+            'sleeps': self.count,
+            'resyncs': self.resyncs,
+            'mean_us': self.total_late_ns / self.count / 1000.0 if self.count else 0.0,
+            'p50_us': pct(0.50),
+            'p99_us': pct(0.99),
+            'max_us': self.max_late_ns / 1000.0,
+        }
+
+class AsyncDeadlineScheduler(DeadlineScheduler):
+    """
+    DeadlineScheduler for asyncio: sleep() is a coroutine, so many sessions
+    can wait on one event loop. Same deadlines, token handling and stats.
+    There's no busy-wait (it would hold up every other task on the loop), so
+    wakeups are as precise as the loop's timer - about a millisecond.
+    """
+
+    async def sleep(self, seconds: float):
+        import asyncio  # on first use - it costs more to import than the whole engine
+        token = self.token
+        speed = token.speed if token is not None else 1.0
+        if not self._schedule(seconds, speed):
+            await asyncio.sleep(0)  # still let the other tasks run
+            return
+
+        while await self._wait_until_async(self._deadline):
+            # woken early by a state change
+            if token.is_stopped():
+                self._deadline = None
+                return
+            remaining = max(0, self._deadline - time.perf_counter_ns())
+            if token.is_paused():
+                if not await token.wait_resumed_async():
+                    self._deadline = None
+                    return
+            speed = self._rescale(remaining, speed)
+
+        self._record(time.perf_counter_ns() - self._deadline)
+
+    async def _wait_until_async(self, deadline: int) -> bool:
+        """Wait for the deadline. Returns True if interrupted by a token state change."""
+        import asyncio
+        token = self.token
+        version = token.version if token is not None else 0
+        remaining = deadline - time.perf_counter_ns()
+        if remaining <= 0:
+            await asyncio.sleep(0)
+            return False
+        timeout = remaining / 1_000_000_000
+        if token is not None:
+            return await token.wait_for_change_async(version, timeout)
+        await asyncio.sleep(timeout)
+        return False
+
+class VirtualClock:
+    """
+    Stand-in for DeadlineScheduler that adds delays up instead of sleeping.
+    Used by dry runs to work out how long typing would take.
+    """
+
+    def __init__(self, token=None):
+        self.token = token  # only its speed multiplier is used
+        self.count = 0
+        self.elapsed_ns = 0
+
+    @property
+    def elapsed(self) -> float:
+        """Simulated time slept so far, in seconds."""
+        return self.elapsed_ns / 1_000_000_000
+
+    def resync(self):
+        pass
+
+    def sleep(self, seconds: float):
+        speed = self.token.speed if self.token is not None else 1.0
+        self.elapsed_ns += int(seconds * 1_000_000_000 / speed)
+        self.count += 1
+
+    def stats(self) -> dict:
+        """Same keys as DeadlineScheduler.stats() - a virtual clock has no jitter."""
+        return {'sleeps': self.count, 'resyncs': 0, 'mean_us': 0.0, 'p50_us': 0.0, 'p99_us': 0.0, 'max_us': 0.0}
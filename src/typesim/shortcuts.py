@@ -2,71 +2,201 @@
 Keyboard shortcuts handler for typing control.
 """
 
-from pynput import keyboard
-from pynput.keyboard import Key
 import threading
+from . import trace
+
+class ControlToken:
+    """
+    Shared pause/stop/speed state for a typing session.
+    Backed by threading.Event so engine sleeps wake up immediately
+    on pause, resume, stop or a speed change instead of polling.
+    Coroutines can wait on it too (the *_async methods), from any event loop.
+    """
+
+    def __init__(self):
+        self._stopped = threading.Event()
+        self._running = threading.Event()  # set while not paused
+        self._running.set()
+        self._changed = threading.Condition()
+        self._version = 0  # bumped on every state change
+        self._speed = 1.0
+        self._waiters = set()  # (loop, future) of coroutines waiting for a change
+
+    def _notify(self):
+        """Wake everyone waiting on a state change."""
+        with self._changed:
+            self._version += 1
+            self._changed.notify_all()
+            waiters, self._waiters = self._waiters, set()
+        for loop, future in waiters:
+            # the change can come from another thread (the hotkey listener)
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                pass  # its loop is closed
+
+    @property
+    def version(self) -> int:
+        """Counter bumped on every state change."""
+        return self._version
+
+    def is_paused(self) -> bool:
+        return not self._running.is_set()
+
+    def set_paused(self, value: bool):
+        if value:
+            self._running.clear()
+        else:
+            self._running.set()
+        self._notify()
+
+    def toggle_pause(self):
+        self.set_paused(not self.is_paused())
+
+    def is_stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    def set_stopped(self, value: bool):
+        if value:
+            self._stopped.set()
+        else:
+            self._stopped.clear()
+        self._notify()
+
+    def request_stop(self):
+        self.set_stopped(True)
+
+    @property
+    def speed(self) -> float:
+        return self._speed
+
+    def set_speed(self, value: float):
+        """Set speed multiplier (0.1 to 5.0)."""
+        self._speed = max(0.1, min(5.0, value))
+        self._notify()
+
+    def reset(self):
+        """Reset all state."""
+        self._stopped.clear()
+        self._running.set()
+        self._speed = 1.0
+        self._notify()
+
+    def wait_for_change(self, version: int, timeout: float | None = None) -> bool:
+        """
+        Block until the state changes after `version` or the timeout runs out.
+        Returns True if the state changed.
+        """
+        with self._changed:
+            return self._changed.wait_for(lambda: self._version != version, timeout)
+
+    def sleep(self, seconds: float) -> bool:
+        """Sleep, waking early on any state change. Returns True if woken early."""
+        return self.wait_for_change(self._version, seconds)
+
+    def wait_resumed(self) -> bool:
+        """Block while paused. Returns False if stopped."""
+        while True:
+            # read the version before the state so a resume can't slip in between
+            version = self._version
+            if self._running.is_set() or self._stopped.is_set():
+                break
+            self.wait_for_change(version)
+        return not self._stopped.is_set()
+
+    async def wait_for_change_async(self, version: int, timeout: float | None = None) -> bool:
+        """wait_for_change() for coroutines - waits without blocking the event loop."""
+        import asyncio  # imported here so the blocking engine never loads it
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._changed:
+            if self._version != version:
+                return True
+            self._waiters.add(waiter)
+        timer = loop.call_later(timeout, _wake, future) if timeout is not None else None
+        try:
+            await future
+        finally:
+            if timer is not None:
+                timer.cancel()
+            with self._changed:
+                self._waiters.discard(waiter)
+        return self._version != version
+
+    async def wait_resumed_async(self) -> bool:
+        """wait_resumed() for coroutines. Returns False if stopped."""
+        while True:
+            version = self._version
+            if self._running.is_set() or self._stopped.is_set():
+                break
+            await self.wait_for_change_async(version)
+        return not self._stopped.is_set()
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
 
 # global state
-_paused = False
-_speed_multiplier = 1.0
-_stop_requested = False
+_token = ControlToken()
 _listener = None
 
+def get_token() -> ControlToken:
+    """Get the global control token."""
+    return _token
+
 def is_paused() -> bool:
     """Check if typing is paused."""
-    return _paused
+    return _token.is_paused()
 
 def toggle_pause():
     """Toggle pause state."""
-    global _paused
-    _paused = not _paused
+    _token.toggle_pause()
 
 def set_paused(value: bool):
     """Set pause state."""
-    global _paused
-    _paused = value
+    _token.set_paused(value)
 
 def get_speed_multiplier() -> float:
     """Get current speed multiplier."""
-    return _speed_multiplier
+    return _token.speed
 
 def set_speed_multiplier(value: float):
     """Set speed multiplier (0.1 to 5.0)."""
-    global _speed_multiplier
-    _speed_multiplier = max(0.1, min(5.0, value))
+    _token.set_speed(value)
 
 def increase_speed(amount: float = 0.1):
     """Increase speed."""
-    set_speed_multiplier(_speed_multiplier + amount)
+    set_speed_multiplier(_token.speed + amount)
 
 def decrease_speed(amount: float = 0.1):
     """Decrease speed."""
-    set_speed_multiplier(_speed_multiplier - amount)
+    set_speed_multiplier(_token.speed - amount)
 
 def request_stop():
     """Request stop."""
-    global _stop_requested
-    _stop_requested = True
+    _token.request_stop()
 
 def is_stopped() -> bool:
     """Check if stop requested."""
-    return _stop_requested
+    return _token.is_stopped()
 
 def reset():
     """Reset all state."""
-    global _paused, _speed_multiplier, _stop_requested
-    _paused = False
-    _speed_multiplier = 1.0
-    _stop_requested = False
+    _token.reset()
 
 def setup_shortcuts_listener():
     """Set up keyboard shortcuts listener."""
     global _listener
+    # imported here so just reading the control state doesn't load pynput
+    from pynput import keyboard
+    from pynput.keyboard import Key
     
     # track pressed keys for combinations
     _ctrl_pressed = False
     _alt_pressed = False
     
+    @trace.traced('hotkey', 'listener')
     def on_press(key):
         nonlocal _ctrl_pressed, _alt_pressed
         try:
@@ -0,0 +1,391 @@
+"""
+Output sinks - where keystrokes end up.
+pynput (default), a null sink for engine benchmarks, an in-memory recording
+sink, and batched xdotool/ydotool backends.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import time
+from . import shortcuts
+from . import textprep
+
+# one Ctrl+Backspace removes trailing spaces plus one run of word chars
+_WORD = re.compile(r'\w+')
+
+def _pace(interval: float, token: shortcuts.ControlToken | None) -> bool:
+    """Wait between paced keys. Returns False if the session was stopped (send no more)."""
+    if token is None:
+        time.sleep(interval)
+        return True
+    token.sleep(interval)  # wakes early on any state change
+    if token.is_paused():
+        token.wait_resumed()
+    return not token.is_stopped()
+
+async def _pace_async(interval: float, token: shortcuts.ControlToken | None) -> bool:
+    """_pace() for coroutines."""
+    if token is None:
+        import asyncio
+        await asyncio.sleep(interval)
+        return True
+    await token.wait_for_change_async(token.version, interval)
+    if token.is_paused():
+        await token.wait_resumed_async()
+    return not token.is_stopped()
+
+class Sink:
+    """Base class for keystroke outputs."""
+
+    name = "base"
+
+    def type_text(self, text: str):
+        """Type text as-is."""
+        raise NotImplementedError
+
+    def backspace(self, count: int, interval: float = 0.0, token: shortcuts.ControlToken | None = None):
+        """
+        Press backspace N times, `interval` seconds apart. With a token, the
+        waits between keys end early on stop (the rest is dropped) and hold on pause.
+        """
+        raise NotImplementedError
+
+    def word_backspace(self, count: int, interval: float = 0.0, token: shortcuts.ControlToken | None = None):
+        """Delete N words with Ctrl+Backspace (paced like backspace())."""
+        raise NotImplementedError
+
+    def press_enter(self):
+        self.type_text("\n")
+
+    def press_space(self):
+        self.type_text(" ")
+
+    def flush(self):
+        """Send anything batched so far (called before every delay)."""
+
+    # the asyncio engine calls these instead, so slow sinks can wait without
+    # blocking the event loop (the defaults suit sinks that never block);
+    # asyncio is imported in the overrides, so it stays out of startup
+
+    async def backspace_async(self, count: int, interval: float = 0.0, token: shortcuts.ControlToken | None = None):
+        self.backspace(count, interval, token)
+
+    async def word_backspace_async(self, count: int, interval: float = 0.0, token: shortcuts.ControlToken | None = None):
+        self.word_backspace(count, interval, token)
+
+    async def flush_async(self):
+        self.flush()
+
+    def close(self):
+        """Release resources."""
+        self.flush()
+
+class PynputSink(Sink):
+    """Types through a pynput keyboard Controller."""
+
+    name = "pynput"
+
+    def __init__(self):
+        # pynput is imported on first use - it connects to the display server
+        from pynput.keyboard import Key, KeyCode, Controller
+        self.Key = Key
+        self.KeyCode = KeyCode
+        self.controller = Controller()
+        self._slow = {}  # non-ascii cluster -> KeyCodes that typed it, or the plain char typed instead
+
+    def type_text(self, text: str):
+        if text.isascii():
+            self.controller.type(text)
+            return
+        # non-ascii clusters can need keymap remapping (or fail), so they go one by one
+        plain = []
+        for cluster in textprep.clusters(text):
+            if cluster.isascii():
+                plain.append(cluster)
+                continue
+            if plain:
+                self.controller.type(''.join(plain))
+                plain.clear()
+            self._type_slow(cluster)
+        if plain:
+            self.controller.type(''.join(plain))
+
+    def _type_slow(self, cluster: str):
+        """
+        Type a non-ascii grapheme cluster as what the engine counts as one key,
+        remembering how it went so later ones skip failed attempts.
+        """
+        how = self._slow.get(cluster)
+        if how is None:
+            how = self._slow[cluster] = self._try_cluster(cluster)
+        elif isinstance(how, str):
+            self.controller.type(how)
+        else:
+            for key in how:
+                self.controller.tap(key)
+
+    def _try_cluster(self, cluster: str) -> tuple | str:
+        """
+        Tap the code points of a cluster in turn. If the first can't be typed,
+        one fallback char goes out instead; if a later one can't, the cluster
+        stops there (its base is already typed).
+        """
+        ctrl = self.controller
+        keys = []
+        for char in cluster:
+            try:
+                key = self.KeyCode.from_char(char)
+                ctrl.tap(key)
+            except (ctrl.InvalidKeyException, ctrl.InvalidCharacterException):
+                if keys:
+                    break
+                how = textprep.fallback(cluster)
+                ctrl.type(how)
+                return how
+            keys.append(key)
+        return tuple(keys)
+
+    def backspace(self, count: int, interval: float = 0.0, token: shortcuts.ControlToken | None = None):
+        ctrl = self.controller
+        key = self.Key.backspace
+        for _ in range(count):
+            ctrl.press(key)
+            ctrl.release(key)
+            if interval and not _pace(interval, token):
+                return
+
+    def word_backspace(self, count: int, interval: float = 0.0, token: shortcuts.ControlToken | None = None):
+        with self.controller.pressed(self.Key.ctrl):
+            self.backspace(count, interval, token)
+
+    async def backspace_async(self, count: int, interval: float = 0.0, token: shortcuts.ControlToken | None = None):
+        if not interval:
+            self.backspace(count)
+            return
+        ctrl = self.controller
+        key = self.Key.backspace
+        for _ in range(count):
+            ctrl.press(key)
+            ctrl.release(key)
+            if not await _pace_async(interval, token):
+                return
+
+    async def word_backspace_async(self, count: int, interval: float = 0.0, token: shortcuts.ControlToken | None = None):
+        with self.controller.pressed(self.Key.ctrl):
+            await self.backspace_async(count, interval, token)
+
+    def press_enter(self):
+        self.controller.press(self.Key.enter)
+        self.controller.release(self.Key.enter)
+
+    def press_space(self):
+        self.controller.press(self.Key.space)
+        self.controller.release(self.Key.space)
+
+class NullSink(Sink):
+    """Drops keystrokes, only counts them. For measuring pure engine throughput."""
+
+    name = "null"
+
+    def __init__(self):
+        self.typed = 0
+        self.backspaces = 0
+        self.paced = 0.0  # seconds a real sink would spend between paced backspaces
+
+    @property
+    def keystrokes(self) -> int:
+        return self.typed + self.backspaces
+
+    def type_text(self, text: str):
+        self.typed += len(text)
+
+    def backspace(self, count: int, interval: float = 0.0, token: shortcuts.ControlToken | None = None):
+        self.backspaces += count
+        self.paced += count * interval
+
+    def word_backspace(self, count: int, interval: float = 0.0, token: shortcuts.ControlToken | None = None):
+        self.backspaces += count
+        self.paced += count * interval
+
+class RecordingSink(NullSink):
+    """Applies keystrokes to an in-memory text buffer."""
+
+    name = "recording"
+
+    def __init__(self):
+        super().__init__()
+        self.buffer = []  # one entry per grapheme cluster, each backspace removes one
+
+    @property
+    def text(self) -> str:
+        return ''.join(self.buffer)
+
+    def type_text(self, text: str):
+        super().type_text(text)
+        self.buffer.extend(textprep.clusters(text))
+
+    def backspace(self, count: int, interval: float = 0.0, token: shortcuts.ControlToken | None = None):
+        super().backspace(count, interval)
+        if count:
+            del self.buffer[-count:]
+
+    def word_backspace(self, count: int, interval: float = 0.0, token: shortcuts.ControlToken | None = None):
+        super().word_backspace(count, interval)
+        buffer = self.buffer
+        for _ in range(count):
+            # walk back over trailing spaces, then over clusters that are all word chars
+            end = len(buffer)
+            while end and buffer[end - 1] == ' ':
+                end -= 1
+            start = end
+            while start and _WORD.fullmatch(buffer[start - 1]):
+                start -= 1
+            del buffer[start if start < end else max(0, len(buffer) - 1):]
+
+class CommandSink(Sink):
+    """
+    Base for external tools: commands are batched into one process per flush
+    instead of one process per keystroke.
+    """
+
+    tool = ""
+
+    def __init__(self, max_batch: int = 200):
+        if shutil.which(self.tool) is None:
+            raise RuntimeError(f"{self.tool} not found in PATH")
+        self.max_batch = max_batch
+        self._pending = []  # argv fragments for the next run
+        self._env = None  # environment for the tool (None = ours)
+
+    def _queue(self, *args: str):
+        self._pending.append(args)
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+
+    def _commands(self) -> list[list[str]]:
+        """Take the queued commands as the argv of each process to run."""
+        raise NotImplementedError
+
+    def flush(self):
+        for argv in self._commands():
+            subprocess.run(argv, check=False, env=self._env)
+
+    async def flush_async(self):
+        import asyncio
+        for argv in self._commands():
+            proc = await asyncio.create_subprocess_exec(*argv, env=self._env)
+            await proc.wait()
+
+    def backspace(self, count: int, interval: float = 0.0, token: shortcuts.ControlToken | None = None):
+        if interval and count > 1:
+            # paced backspaces can't be batched
+            for _ in range(count):
+                self.backspace(1)
+                self.flush()
+                if not _pace(interval, token):
+                    return
+            return
+        self._backspace(count)
+
+    async def backspace_async(self, count: int, interval: float = 0.0, token: shortcuts.ControlToken | None = None):
+        if interval and count > 1:
+            for _ in range(count):
+                self._backspace(1)
+                await self.flush_async()
+                if not await _pace_async(interval, token):
+                    return
+            return
+        self._backspace(count)
+
+    def word_backspace(self, count: int, interval: float = 0.0, token: shortcuts.ControlToken | None = None):
+        self._word_backspace(count)
+
+    async def word_backspace_async(self, count: int, interval: float = 0.0, token: shortcuts.ControlToken | None = None):
+        self._word_backspace(count)
+
+class XdotoolSink(CommandSink):
+    """
+    Types with xdotool, chaining queued commands into as few invocations as
+    possible. `type` takes every argument after it as text, so it always
+    ends an invocation. With `window`, keys go to that X window instead of the focused one.
+    With `display`, xdotool runs on that X display instead of $DISPLAY.
+    """
+
+    name = "xdotool"
+    tool = "xdotool"
+
+    def __init__(self, window: str | None = None, display: str | None = None, max_batch: int = 200):
+        super().__init__(max_batch)
+        self._target = ["--window", str(window)] if window else []
+        if display:
+            self._env = dict(os.environ, DISPLAY=display)
+
+    def type_text(self, text: str):
+        pending = self._pending
+        if pending and pending[-1][0] == "type":
+            # text right after text: one command
+            pending[-1] = pending[-1][:-1] + (pending[-1][-1] + text,)
+            return
+        self._queue("type", *self._target, "--delay", "0", "--", text)
+
+    def _backspace(self, count: int):
+        self._queue("key", *self._target, "--delay", "0", "--repeat", str(count), "BackSpace")
+
+    def _word_backspace(self, count: int):
+        self._queue("key", *self._target, "--delay", "0", "--repeat", str(count), "ctrl+BackSpace")
+
+    def _commands(self) -> list[list[str]]:
+        commands = []
+        argv = ["xdotool"]
+        for args in self._pending:
+            argv.extend(args)
+            if args[0] == "type":
+                commands.append(argv)
+                argv = ["xdotool"]
+        if len(argv) > 1:
+            commands.append(argv)
+        self._pending = []
+        return commands
+
+class YdotoolSink(CommandSink):
+    """Types with ydotool (uinput), so it works without an X server."""
+
+    name = "ydotool"
+    tool = "ydotool"
+
+    # linux input event codes
+    KEY_BACKSPACE = 14
+    KEY_LEFTCTRL = 29
+
+    def type_text(self, text: str):
+        self._queue("type", "--key-delay", "0", "--", text)
+
+    @staticmethod
+    def _taps(code: int, count: int) -> list[str]:
+        """Press+release events for a key, `count` times."""
+        return [f"{code}:1", f"{code}:0"] * count
+
+    def _backspace(self, count: int):
+        self._queue("key", "--key-delay", "0", *self._taps(self.KEY_BACKSPACE, count))
+
+    def _word_backspace(self, count: int):
+        ctrl = self.KEY_LEFTCTRL
+        self._queue("key", "--key-delay", "0", f"{ctrl}:1", *self._taps(self.KEY_BACKSPACE, count), f"{ctrl}:0")
+
+    def _commands(self) -> list[list[str]]:
+        # ydotool has no command chaining - one process per queued command
+        pending, self._pending = self._pending, []
+        return [["ydotool", *args] for args in pending]
+
+# name -> sink class
+SINKS = {cls.name: cls for cls in (PynputSink, NullSink, RecordingSink, XdotoolSink, YdotoolSink)}
+
+def create_sink(name: str, **options) -> Sink:
+    """Create a sink by name (see SINKS)."""
+    try:
+        cls = SINKS[name]
+    except KeyError:
+        raise ValueError(f"unknown output sink: {name} (choose from {', '.join(SINKS)})") from None
+    return cls(**options)
@@ -0,0 +1,115 @@
+"""
+Streaming input: type text while it's still being read, keeping only a
+bounded window of it in memory.
+"""
+
+import codecs
+from typing import BinaryIO, Iterable, Iterator
+from . import textindex
+
+# chars kept behind the planner for going back to edit or rephrase
+KEEP_BEHIND = 8192
+
+# how far past the furthest char read to keep buffered (the planner peeks a few chars ahead)
+READ_AHEAD = 64
+
+def read_chunks(f: BinaryIO, size: int = 65536) -> Iterator[str]:
+    """
+    Yield text from a binary file (or pipe/FIFO) as it arrives.
+    Uses read1 where available so a slow pipe doesn't hold up a whole chunk.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    read = getattr(f, 'read1', f.read)
+    while True:
+        data = read(size)
+        if not data:
+            break
+        text = decoder.decode(data)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+class StreamingText:
+    """
+    str-like view of a stream of chunks, indexed by absolute position.
+    Only a window of the text is kept: the planner calls release(pos) as it
+    goes, and text more than `behind` chars before that is dropped.
+
+    len() is the length buffered so far: it reads on until at least `ahead`
+    chars past the furthest index read are available (or the input ends), so
+    `i < len(text)` loops work as with a str.
+
+    Word and sentence offsets are indexed as chunks come in (see boundaries).
+    """
+
+    def __init__(self, chunks: Iterable[str], behind: int = KEEP_BEHIND, ahead: int = READ_AHEAD):
+        self._chunks = iter(chunks)
+        self.behind = behind
+        self.ahead = ahead
+        self.start = 0  # absolute position of _buf[0]
+        self._buf = ''
+        self._hi = -1  # furthest index read
+        self._released = 0
+        self.eof = False
+        self.boundaries = textindex.TextIndex()
+
+    @property
+    def end(self) -> int:
+        """Absolute end of the buffered text."""
+        return self.start + len(self._buf)
+
+    def _pull(self) -> bool:
+        """Read one more chunk. Returns False at the end of the input."""
+        if self.eof:
+            return False
+        for chunk in self._chunks:
+            if chunk:
+                self._buf += chunk
+                # index up to the last whitespace - the word after it may go on in the next chunk
+                cut = max(self._buf.rfind(' '), self._buf.rfind('\n'), self._buf.rfind('\t')) + 1
+                self.boundaries.add(self._buf, self.start, self.start + cut)
+                return True
+        self.eof = True
+        self.boundaries.add(self._buf, self.start, self.end)
+        return False
+
+    def _fill(self, pos: int):
+        """Buffer up to pos (exclusive) if the input goes that far."""
+        while self.end < pos and self._pull():
+            pass
+
+    def __len__(self) -> int:
+        self._fill(self._hi + self.ahead + 1)
+        return self.end
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop = key.start or 0, key.stop
+            if stop is None:
+                stop = len(self)
+            self._fill(stop)
+            start = max(start, self.start) - self.start
+            return self._buf[start:max(0, stop - self.start):key.step]
+        if key < 0:
+            raise IndexError("negative index into streaming text")
+        if key >= self.end:
+            self._fill(key + 1)
+        if key < self.start or key >= self.end:
+            raise IndexError("streaming text index outside the buffered window")
+        if key > self._hi:
+            self._hi = key
+        return self._buf[key - self.start]
+
+    def release(self, position: int):
+        """The planner is at position - text before position - behind may be dropped."""
+        if position <= self._released:
+            return
+        self._released = position
+        drop = position - self.behind - self.start
+        # trim in big steps so the copy is amortized
+        if drop >= self.behind:
+            self._buf = self._buf[drop:]
+            self.start += drop
+            self.boundaries.trim(self.start)
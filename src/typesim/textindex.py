@@ -0,0 +1,98 @@
+"""
+Word, sentence and paragraph offsets of a text, found in one pass and kept
+in sorted arrays, so finding where to go back and edit is a bisect instead
+of a scan.
+"""
+
+from __future__ import annotations
+
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .streaming import StreamingText
+
+_WORD = re.compile(r'\S+')
+_SENTENCE_END = re.compile(r'[.!?]')
+_BREAK = re.compile(r'\n')
+
+class TextIndex:
+    """
+    Sorted absolute offsets into a text:
+    word_starts - first char of each word (a run of non-whitespace)
+    sentence_ends - just past each sentence end char (.!?)
+    breaks - just past each newline (where a paragraph starts)
+
+    Sentences start after a sentence end or a newline, at the next word, and
+    end at the next end char - the same spans the prefetcher asks to rephrase.
+    """
+
+    def __init__(self, text: str = '', typecode: str = 'q'):
+        self.word_starts = array(typecode)
+        self.sentence_ends = array(typecode)
+        self.breaks = array(typecode)
+        self.start = 0  # offsets before this were dropped (streaming)
+        self.length = 0  # text is indexed up to here
+        if text:
+            self.add(text, 0, len(text))
+
+    def add(self, buf: str, offset: int, end: int):
+        """
+        Index buf (buf[0] is at absolute position offset) from where the last
+        call stopped up to end. end must be just past whitespace, or the end
+        of the text, so no word is cut in two.
+        """
+        lo, hi = self.length - offset, end - offset
+        if hi <= lo:
+            return
+        self.word_starts.extend(m.start() + offset for m in _WORD.finditer(buf, lo, hi))
+        self.sentence_ends.extend(m.end() + offset for m in _SENTENCE_END.finditer(buf, lo, hi))
+        self.breaks.extend(m.end() + offset for m in _BREAK.finditer(buf, lo, hi))
+        self.length = end
+
+    def trim(self, before: int):
+        """Drop offsets before this position."""
+        for offsets in (self.word_starts, self.sentence_ends, self.breaks):
+            del offsets[:bisect_left(offsets, before)]
+        self.start = before
+
+    def sentence_bounds(self, position: int) -> tuple[int, int]:
+        """(start, end) of the sentence around position."""
+        ends = self.sentence_ends
+        i = bisect_right(ends, position)
+        boundary = ends[i - 1] if i else self.start
+        j = bisect_right(self.breaks, position)
+        if j and self.breaks[j - 1] > boundary:
+            boundary = self.breaks[j - 1]
+        # skip the whitespace after the boundary
+        k = bisect_left(self.word_starts, boundary)
+        start = self.word_starts[k] if k < len(self.word_starts) else boundary
+        end = ends[i] if i < len(ends) else self.length
+        return start, end
+
+    def sentences_ending(self, start: int, end: int) -> list[tuple[int, int]]:
+        """(start, end) of every sentence whose end char is in [start, end)."""
+        ends = self.sentence_ends
+        lo, hi = bisect_right(ends, start), bisect_right(ends, end)
+        return [self.sentence_bounds(ends[i] - 1) for i in range(lo, hi)]
+
+    def word_start(self, start: int, position: int) -> int:
+        """Start of the last word that begins in [start, position), or start if none does."""
+        i = bisect_left(self.word_starts, position)
+        if i and self.word_starts[i - 1] >= start:
+            return self.word_starts[i - 1]
+        return start
+
+    def words(self, start: int, end: int) -> array:
+        """Starts of the words that begin in [start, end)."""
+        starts = self.word_starts
+        return starts[bisect_left(starts, start):bisect_left(starts, end)]
+
+def index_of(text: str | StreamingText) -> TextIndex:
+    """Index of a text: a StreamingText keeps its own as it reads, a str is indexed now."""
+    index = getattr(text, 'boundaries', None)
+    if index is not None:
+        return index
+    return TextIndex(text, 'I' if len(text) < 2 ** 32 else 'q')
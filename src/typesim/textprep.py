@@ -0,0 +1,127 @@
+"""
+Input pre-pass for non-ASCII text.
+Normalizes the text (NFC, plus an optional translation table for chars like
+smart quotes and dashes), finds chars that have no key on the keyboard
+layout, and splits text into grapheme clusters so an accented letter or an
+emoji sequence is typed - and deleted - as one key.
+"""
+
+import unicodedata
+from typing import Iterable, Iterator
+from . import config
+from . import layouts
+
+# built-in translation tables (char_translation setting)
+_TYPOGRAPHIC = {
+    '\u2018': "'", '\u2019': "'", '\u201a': "'", '\u201b': "'", '\u2032': "'",  # single quotes, prime
+    '\u201c': '"', '\u201d': '"', '\u201e': '"', '\u201f': '"', '\u2033': '"',  # double quotes
+    '\u00ab': '"', '\u00bb': '"', '\u2039': "'", '\u203a': "'",  # guillemets
+    '\u2010': '-', '\u2011': '-', '\u2012': '-', '\u2013': '-', '\u2212': '-',  # hyphens, en dash, minus
+    '\u2014': '--', '\u2015': '--',  # em dash, bar
+    '\u2026': '...', '\u2022': '*',  # ellipsis, bullet
+    '\u00a0': ' ', '\u2007': ' ', '\u2009': ' ', '\u200a': ' ', '\u202f': ' ',  # no-break/thin spaces
+    '\u00ad': '', '\u200b': '', '\ufeff': '',  # soft hyphen, zero width space, BOM
+}
+
+TRANSLATIONS = {
+    'off': {},
+    'typographic': _TYPOGRAPHIC,  # quotes, dashes, odd spaces -> ascii; letters are kept
+    'ascii': _TYPOGRAPHIC,  # same, and accents are stripped (see prepare)
+}
+
+_WHITESPACE = frozenset(' \n\t\r')
+
+def translation_table(name: str, extra: dict | None = None) -> dict:
+    """str.translate() table for a built-in table name plus extra {char: replacement}."""
+    mapping = dict(TRANSLATIONS.get(name, {}))
+    if extra:
+        mapping.update(extra)
+    return str.maketrans(mapping) if mapping else {}
+
+def prepare(text: str, table: dict, strip_accents: bool = False) -> str:
+    """Normalize text before typing: NFC, then the translation table."""
+    if text.isascii():
+        # already normalized, but char_map can still remap ascii chars
+        return text.translate(table) if any(code < 0x80 for code in table) else text
+    if strip_accents:
+        text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    text = unicodedata.normalize('NFC', text)
+    return text.translate(table) if table else text
+
+def prepare_settings(text: str, settings: config.Settings) -> str:
+    """prepare() with the char_translation/char_map settings."""
+    table = translation_table(settings.char_translation, settings.char_map)
+    return prepare(text, table, settings.char_translation == 'ascii')
+
+def prepare_chunks(chunks: Iterable[str], settings: config.Settings) -> Iterator[str]:
+    """prepare_settings() for streamed chunks."""
+    table = translation_table(settings.char_translation, settings.char_map)
+    strip_accents = settings.char_translation == 'ascii'
+    for chunk in chunks:
+        yield prepare(chunk, table, strip_accents)
+
+def fallback(cluster: str) -> str:
+    """One plain char to type when a char or cluster can't be typed at all (so backspace counts still match)."""
+    mapped = _TYPOGRAPHIC.get(cluster)
+    if mapped:
+        return mapped[0]
+    base = unicodedata.normalize('NFKD', cluster)[:1]
+    return base if base.isascii() and base.isprintable() else '?'
+
+def is_direct(char: str, layout: str = layouts.DEFAULT_LAYOUT) -> bool:
+    """Can the char be typed with one key (plus shift) on the layout?"""
+    if char in _WHITESPACE:
+        return True
+    table = layouts.get_table(layout)
+    code = ord(char)
+    return code < len(table) and bool(table[code])
+
+def slow_chars(text: str, layout: str = layouts.DEFAULT_LAYOUT) -> list[str]:
+    """Distinct chars of text that aren't on the layout (the sink's slow path)."""
+    return sorted(c for c in set(text) if not is_direct(c, layout))
+
+def _extends(char: str) -> bool:
+    """Does char attach to the one before it (combining mark, variation selector, skin tone, tag)?"""
+    code = ord(char)
+    return (0xFE00 <= code <= 0xFE0F or 0x1F3FB <= code <= 0x1F3FF or 0xE0020 <= code <= 0xE007F
+            or 0xE0100 <= code <= 0xE01EF or unicodedata.category(char) in ('Mn', 'Me', 'Mc'))
+
+def _is_flag_half(char: str) -> bool:
+    return 0x1F1E6 <= ord(char) <= 0x1F1FF
+
+def cluster_end(text, start: int) -> int:
+    """End of the grapheme cluster that starts at start (a simplified UAX #29)."""
+    end = start + 1
+    if _is_flag_half(text[start]) and text[end:end + 1] and _is_flag_half(text[end]):
+        end += 1  # two regional indicators make a flag
+    while True:
+        nxt = text[end:end + 1]
+        if nxt == '\u200d' and text[end + 1:end + 2]:
+            end += 2  # zero width joiner glues on the next char
+        elif nxt >= '\u0300' and _extends(nxt):
+            end += 1
+        else:
+            return end
+
+def clusters(text: str) -> Iterable[str]:
+    """Split text into grapheme clusters."""
+    if text.isascii():
+        return text
+    return _iter_clusters(text)
+
+def _iter_clusters(text: str) -> Iterator[str]:
+    i = 0
+    while i < len(text):
+        end = cluster_end(text, i)
+        yield text[i:end]
+        i = end
+
+def key_count(text: str) -> int:
+    """Number of grapheme clusters - backspaces needed to delete text."""
+    if text.isascii():
+        return len(text)
+    count, i = 0, 0
+    while i < len(text):
+        i = cluster_end(text, i)
+        count += 1
+    return count
@@ -0,0 +1,207 @@
+"""
+Optional tracing of where a session's wall time goes: key emits, sleeps
+(and how late they wake), Gemini calls and hotkey callbacks.
+
+Writes Chrome trace-event JSON (open in Perfetto or chrome://tracing) and
+prints a per-span summary. While off, the hot path is untouched: the
+executor only wraps its sink and clock when a trace is running.
+"""
+
+import functools
+import json
+import threading
+import time
+
+# stop recording events after this many (summary stats keep counting)
+MAX_EVENTS = 1_000_000
+
+class Tracer:
+    """Collects complete ('X') trace events and per-name durations."""
+
+    def __init__(self, max_events: int = MAX_EVENTS):
+        self.max_events = max_events
+        self.started_ns = time.perf_counter_ns()
+        self.events = []
+        self.dropped = 0
+        self.durations = {}  # name -> [microseconds]
+        self._threads = {}  # native thread id -> name
+        self._lock = threading.Lock()
+
+    def add(self, name: str, cat: str, start_ns: int, end_ns: int, args: dict | None = None):
+        """Record a span that ran from start_ns to end_ns (perf_counter_ns)."""
+        dur_us = (end_ns - start_ns) / 1000.0
+        tid = threading.get_native_id()
+        event = {
+            'name': name, 'cat': cat, 'ph': 'X', 'pid': 1, 'tid': tid,
+            'ts': (start_ns - self.started_ns) / 1000.0, 'dur': dur_us,
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            if tid not in self._threads:
+                self._threads[tid] = threading.current_thread().name
+            self.durations.setdefault(name, []).append(dur_us)
+            if len(self.events) < self.max_events:
+                self.events.append(event)
+            else:
+                self.dropped += 1
+
+    def sample(self, name: str, value_us: float):
+        """Record a value for the summary only (no trace event)."""
+        with self._lock:
+            self.durations.setdefault(name, []).append(value_us)
+
+    def save(self, path: str):
+        """Write the trace as Chrome trace-event JSON."""
+        meta = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': name}}
+            for tid, name in self._threads.items()
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': meta + self.events, 'displayTimeUnit': 'ms'}, f)
+
+    def summary(self) -> str:
+        """Per-name count, total, percentiles and a log2 histogram of durations."""
+        lines = [f"{'span':<24} {'count':>8} {'total':>9} {'mean':>9} {'p50':>9} {'p99':>9} {'max':>9}  histogram (us, log2)"]
+        for name, values in sorted(self.durations.items(), key=lambda item: -sum(item[1])):
+            values = sorted(values)
+            n = len(values)
+            total = sum(values)
+            buckets = {}
+            for v in values:
+                b = max(0, int(v).bit_length() - 1)
+                buckets[b] = buckets.get(b, 0) + 1
+            hist = ' '.join(f"{1 << b}:{buckets[b]}" for b in sorted(buckets))
+            lines.append(
+                f"{name:<24} {n:>8} {total / 1e6:>8.2f}s {_ms(total / n):>9} "
+                f"{_ms(values[n // 2]):>9} {_ms(values[min(n - 1, int(n * 0.99))]):>9} {_ms(values[-1]):>9}  {hist}"
+            )
+        if self.dropped:
+            lines.append(f"({self.dropped} events not written to the trace, over the {self.max_events} limit)")
+        return '\n'.join(lines)
+
+def _ms(us: float) -> str:
+    return f"{us / 1000:.2f}ms"
+
+# running tracer (None = tracing off)
+_tracer = None
+
+def get_tracer() -> Tracer | None:
+    """Get the running tracer, or None if tracing is off."""
+    return _tracer
+
+def start() -> Tracer:
+    """Start tracing."""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+def stop() -> Tracer | None:
+    """Stop tracing and return the tracer that was running."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+def traced(name: str, cat: str):
+    """Decorator: record calls as spans while tracing (one None check when off)."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return fn(*args, **kwargs)
+            start_ns = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                tracer.add(name, cat, start_ns, time.perf_counter_ns())
+        return wrapper
+    return decorate
+
+def traced_async(name: str, cat: str):
+    """traced() for coroutine functions (the span covers the whole await)."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return await fn(*args, **kwargs)
+            start_ns = time.perf_counter_ns()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                tracer.add(name, cat, start_ns, time.perf_counter_ns())
+        return wrapper
+    return decorate
+
+class TracedSink:
+    """Wraps an output sink and records every emit."""
+
+    def __init__(self, sink, tracer: Tracer):
+        self._sink = sink
+        self._tracer = tracer
+
+    def __getattr__(self, name):
+        return getattr(self._sink, name)
+
+    def _span(self, name: str, fn, *args):
+        start_ns = time.perf_counter_ns()
+        fn(*args)
+        self._tracer.add(name, 'emit', start_ns, time.perf_counter_ns())
+
+    def type_text(self, text: str):
+        self._span('emit.type', self._sink.type_text, text)
+
+    def backspace(self, count: int, interval: float = 0.0, token=None):
+        self._span('emit.backspace', self._sink.backspace, count, interval, token)
+
+    def word_backspace(self, count: int, interval: float = 0.0, token=None):
+        self._span('emit.word_backspace', self._sink.word_backspace, count, interval, token)
+
+    def flush(self):
+        self._span('emit.flush', self._sink.flush)
+
+    async def _span_async(self, name: str, fn, *args):
+        start_ns = time.perf_counter_ns()
+        await fn(*args)
+        self._tracer.add(name, 'emit', start_ns, time.perf_counter_ns())
+
+    async def backspace_async(self, count: int, interval: float = 0.0, token=None):
+        await self._span_async('emit.backspace', self._sink.backspace_async, count, interval, token)
+
+    async def word_backspace_async(self, count: int, interval: float = 0.0, token=None):
+        await self._span_async('emit.word_backspace', self._sink.word_backspace_async, count, interval, token)
+
+    async def flush_async(self):
+        await self._span_async('emit.flush', self._sink.flush_async)
+
+class TracedClock:
+    """Wraps a scheduler and records each sleep with how late it woke up."""
+
+    def __init__(self, clock, tracer: Tracer):
+        self._clock = clock
+        self._tracer = tracer
+
+    def __getattr__(self, name):
+        return getattr(self._clock, name)
+
+    def sleep(self, seconds: float):
+        late_before = getattr(self._clock, 'total_late_ns', 0)
+        start_ns = time.perf_counter_ns()
+        self._clock.sleep(seconds)
+        self._record(seconds, start_ns, late_before)
+
+    def _record(self, seconds: float, start_ns: int, late_before: int):
+        end_ns = time.perf_counter_ns()
+        late_us = (getattr(self._clock, 'total_late_ns', 0) - late_before) / 1000.0
+        self._tracer.add('sleep', 'sleep', start_ns, end_ns, {'requested_ms': seconds * 1000, 'late_us': late_us})
+        self._tracer.sample('sleep.overshoot', late_us)
+
+class AsyncTracedClock(TracedClock):
+    """TracedClock for scheduler.AsyncDeadlineScheduler."""
+
+    async def sleep(self, seconds: float):
+        late_before = getattr(self._clock, 'total_late_ns', 0)
+        start_ns = time.perf_counter_ns()
+        await self._clock.sleep(seconds)
+        self._record(seconds, start_ns, late_before)
@@ -1,9 +1,8 @@
 """
 Text User Interface for settings and configuration.
-Uses inquirer for arrow-key navigation.
+Uses inquirer for arrow-key navigation (imported only when a menu is shown).
 """
 
-import inquirer
 from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Prompt, Confirm
@@ -13,12 +12,32 @@ from rich.align import Align
 from rich import box
 from typing import Callable, Any
 from . import config_manager
+from . import config
+from . import layouts
+from . import progress
 
 console = Console()
 
 # Credits footer to display on all menus
 CREDITS = "made by pcstyle"
 
+# last text entered or loaded for typing - settings/presets show time estimates for it
+_loaded_text = None
+
+def set_loaded_text(text: str | None):
+    """Remember the text to show time estimates for."""
+    global _loaded_text
+    _loaded_text = text or None
+
+def estimate_time(settings: config.Settings | None = None) -> str | None:
+    """Estimated time to type the loaded text (dry run), or None if no text is loaded."""
+    if _loaded_text is None:
+        return None
+    from . import dryrun
+    # fixed seed so estimates for different settings are comparable
+    report = dryrun.dry_run(_loaded_text, settings, seed=0)
+    return progress.format_duration(report['duration_s'])
+
 def print_header(title: str):
     """Print a minimal modern header with title."""
     console.print()
@@ -33,6 +52,7 @@ def print_credits():
 
 def show_main_menu() -> str:
     """Show main menu with arrow key navigation."""
+    import inquirer
     console.clear()
     print_header("typesim")
 
@@ -121,6 +141,7 @@ def edit_int_setting(name: str, current: int, min_val: int = 0, max_val: int = 1
 
 def show_settings_menu():
     """Show settings menu with arrow key navigation."""
+    import inquirer
     cfg = config_manager.get_config_manager()
 
     while True:
@@ -149,6 +170,12 @@ def show_settings_menu():
         table.add_row("use ai", "yes" if cfg.get('use_ai') else "no")
         table.add_row("countdown", f"{cfg.get('countdown_seconds')}s")
         table.add_row("speed", f"{cfg.get('speed_multiplier')}x")
+        table.add_row("keyboard layout", cfg.get('keyboard_layout'))
+
+        estimate = estimate_time()
+        if estimate:
+            table.add_row("", "")
+            table.add_row(f"estimated time ({len(_loaded_text)} chars)", estimate)
 
         console.print(table)
         console.print()
@@ -169,6 +196,7 @@ def show_settings_menu():
                     ('Toggle AI', '8'),
                     ('Countdown', '9'),
                     ('Speed', '10'),
+                    ('Keyboard Layout', '11'),
                     ('Back', 'b'),
                 ],
                 carousel=True
@@ -237,8 +265,15 @@ def show_settings_menu():
             val = edit_number_setting("Speed Multiplier", cfg.get('speed_multiplier'),
                                      min_val=0.1, max_val=5.0, step=0.1)
             cfg.set('speed_multiplier', val)
+        elif choice == "11":
+            # cycle through the layouts
+            names = list(layouts.LAYOUTS)
+            current = cfg.get('keyboard_layout')
+            new_val = names[(names.index(current) + 1) % len(names)] if current in names else names[0]
+            cfg.set('keyboard_layout', new_val)
         
         cfg.save()
+        config.publish_settings()
 
 def get_file_path() -> str | None:
     """Prompt user for file path."""
@@ -274,6 +309,7 @@ def get_file_path() -> str | None:
 
 def show_presets_menu():
     """Show presets menu and allow selection."""
+    import inquirer
     cfg = config_manager.get_config_manager()
     presets = cfg.get_presets()
 
@@ -289,9 +325,14 @@ def show_presets_menu():
     )
     table.add_column(style="cyan", no_wrap=True)
     table.add_column(style="dim")
+    if _loaded_text is not None:
+        table.add_column(style="yellow", justify="right")
 
     for key, preset in presets.items():
-        table.add_row(preset['name'], preset['description'])
+        if _loaded_text is not None:
+            table.add_row(preset['name'], preset['description'], estimate_time(config.preset_settings(key)))
+        else:
+            table.add_row(preset['name'], preset['description'])
 
     console.print(table)
     console.print()
@@ -314,6 +355,7 @@ def show_presets_menu():
     if answers and answers['preset'] != 'cancel':
         preset_key = answers['preset']
         if cfg.apply_preset(preset_key):
+            config.publish_settings()
             console.print()
             console.print(f"  [green]applied {presets[preset_key]['name']}[/green]")
         else:
@@ -360,6 +402,7 @@ def import_config_menu():
 
     if Confirm.ask("  [yellow]overwrite current settings?[/yellow]"):
         if cfg.import_config(path):
+            config.publish_settings()
             console.print()
             console.print(f"  [green]imported from {path}[/green]")
         else:
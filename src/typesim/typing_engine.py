@@ -1,184 +1,230 @@
 """
 Core typing engine with realistic human-like behavior.
 Handles typos, corrections, pauses, and mid-sentence edits.
+
+Typing happens in two steps: the planner turns text into a keystroke plan
+(a list of events), then the executor replays that plan. All decisions happen
+while planning and AI suggestions are prefetched in the background, so the
+emit loop only does timed I/O.
 """
 
+from __future__ import annotations
+
 import random
-import time
+import re
+from typing import TYPE_CHECKING, Iterable
 from . import config
 from . import keyboard_ctrl
-from . import gemini_helper
+from . import progress as progress_mod
+from . import randomness
 from . import shortcuts
+from . import scheduler
+from . import sinks
+from . import textindex
+from . import textprep
+from . import trace
+
+if TYPE_CHECKING:
+    from . import prefetch  # imported lazily - it pulls in the AI stack
+    from .streaming import StreamingText
+
+# keystroke plan events are (op, arg) tuples
+TYPE = 'type'            # arg: text to type
+BACKSPACE = 'backspace'  # arg: number of backspaces
+BULK_BACKSPACE = 'bulk_backspace'  # arg: number of backspaces, sent at the burst rate
+WORD_BACKSPACE = 'word_backspace'  # arg: number of Ctrl+Backspace presses
+SLEEP = 'sleep'          # arg: delay in ms, before the speed multiplier
+PROGRESS = 'progress'    # arg: position in the text (sent at word ends)
 
-def wait_for_resume():
-    """Wait while paused."""
-    while shortcuts.is_paused() and not shortcuts.is_stopped():
-        time.sleep(0.1)
+# bulk_delete_mode values
+BULK_DELETE_MODES = ('burst', 'word', 'off')
 
-def thinking_pause(min_ms: int = None, max_ms: int = None):
+# one Ctrl+Backspace removes trailing spaces plus one run of word chars
+_TRAILING_WORD = re.compile(r'\w+ *\Z')  # \Z: $ would also match before a final newline
+
+def thinking_pause(settings: config.Settings, rng: randomness.SessionRandom, min_ms: float = None, max_ms: float = None) -> tuple:
     """Pause for thinking - longer delay."""
     if min_ms is None:
-        min_ms = config.THINKING_PAUSE_MIN()
+        min_ms = settings.thinking_pause_min
     if max_ms is None:
-        max_ms = config.THINKING_PAUSE_MAX()
+        max_ms = settings.thinking_pause_max
     
-    delay = config.random_delay(min_ms, max_ms)
-    # apply speed multiplier
-    delay /= shortcuts.get_speed_multiplier()
-    time.sleep(delay)
-    wait_for_resume()
+    return (SLEEP, rng.delays.uniform(min_ms, max_ms))
 
-def base_delay():
+def base_delay(settings: config.Settings, rng: randomness.SessionRandom) -> tuple:
     """Normal delay between keystrokes."""
-    delay = config.random_delay(config.BASE_DELAY_MIN(), config.BASE_DELAY_MAX())
-    # apply speed multiplier
-    delay /= shortcuts.get_speed_multiplier()
-    time.sleep(delay)
-    wait_for_resume()
+    return (SLEEP, rng.delays.uniform(settings.base_delay_min, settings.base_delay_max))
+
+def type_string(settings: config.Settings, rng: randomness.SessionRandom, s: str) -> list:
+    """Type a string one char (grapheme cluster) at a time with normal delays."""
+    events = []
+    for c in textprep.clusters(s):
+        events.append((TYPE, c))
+        events.append(base_delay(settings, rng))
+    return events
+
+def _is_word_start(text: str, index: int) -> bool:
+    """Check if index is at the start of a word (nothing word-like right before it)."""
+    if index == 0:
+        return True
+    prev = text[index - 1]
+    return not (prev.isalnum() or prev == '_')
 
-def simulate_typo(char: str) -> tuple[str, bool]:
+def split_word_delete(deleted: str, at_word_start: bool) -> tuple[int, int]:
     """
-    Simulate a typo by hitting a neighboring key.
-    Returns (typed_char, was_typo)
+    Split a deletion into Ctrl+Backspace presses and single backspaces.
+    Whole words are only deleted word-wise when the press can't eat past them.
+    Returns (word_presses, remaining_chars) - words go first, from the end.
+    """
+    end = len(deleted)
+    words = 0
+    while end > 0:
+        m = _TRAILING_WORD.search(deleted, 0, end)
+        if not m or (m.start() == 0 and not at_word_start):
+            break
+        words += 1
+        end = m.start()
+    return words, textprep.key_count(deleted[:end])
+
+def backspace(settings: config.Settings, deleted: str, at_word_start: bool = False) -> list:
+    """
+    Delete text that was just typed.
+    Long deletions use the bulk delete mode instead of one slow backspace per char.
+    """
+    count = textprep.key_count(deleted)  # an accented letter or emoji is one backspace
+    mode = settings.bulk_delete_mode
+    if count < settings.bulk_delete_threshold or mode == 'off':
+        return [(BACKSPACE, count)]
+    
+    if mode == 'word':
+        words, rest = split_word_delete(deleted, at_word_start)
+        events = []
+        if words:
+            events.append((WORD_BACKSPACE, words))
+        if rest:
+            events.append((BULK_BACKSPACE, rest))
+        return events
+    
+    return [(BULK_BACKSPACE, count)]
+
+def make_typo(settings: config.Settings, rng: randomness.SessionRandom, char: str) -> tuple[list, bool]:
+    """
+    Hit a neighboring key instead of char, then fix it.
+    Returns (events, was_typo) - no typo if the char has no neighbors.
     """
-    if not config.should_make_typo():
-        return char, False
-    
     # get a neighbor key for typo
-    neighbor = config.get_neighbor_key(char)
+    neighbor = config.get_neighbor_key(char, rng.typos, settings.keyboard_layout)
     if neighbor:
-        return neighbor, True
+        # brief pause, then correct
+        events = [(TYPE, neighbor), base_delay(settings, rng), thinking_pause(settings, rng, 150, 400)]
+        events.extend(backspace_and_fix(settings, rng, char))
+        return events, True
     
-    # fallback: just return original if no neighbor found
-    return char, False
+    # no neighbor found
+    return [(TYPE, char), base_delay(settings, rng)], False
 
-def backspace_and_fix(original: str):
+def backspace_and_fix(settings: config.Settings, rng: randomness.SessionRandom, original: str) -> list:
     """Backspace and retype correctly."""
-    # backspace the wrong chars
-    keyboard_ctrl.press_backspace(len(original))
-    base_delay()
-    
-    # retype correctly
-    for c in original:
-        keyboard_ctrl.type_char(c)
-        base_delay()
+    # backspace the wrong chars, then retype correctly
+    events = backspace(settings, original)
+    events.append(base_delay(settings, rng))
+    events.extend(type_string(settings, rng, original))
+    return events
 
-def find_sentence_boundaries(text: str, position: int) -> tuple[int, int]:
+def find_sentence_boundaries(index: textindex.TextIndex, position: int) -> tuple[int, int]:
     """
     Find sentence boundaries around position.
     Returns (sentence_start, sentence_end).
     """
-    # look for sentence end markers
-    sentence_end_chars = '.!?'
-    
-    # find previous sentence end
-    start = 0
-    for i in range(position - 1, -1, -1):
-        if text[i] in sentence_end_chars:
-            start = i + 1
-            # skip whitespace
-            while start < len(text) and text[start] in ' \n\t':
-                start += 1
-            break
-    
-    # find next sentence end
-    end = len(text)
-    for i in range(position, len(text)):
-        if text[i] in sentence_end_chars:
-            end = i + 1
-            break
-    
-    return start, end
+    return index.sentence_bounds(position)
 
-def rephrase_and_type_sentence(text: str, start: int, end: int, current_position: int, rephrased_sentences: set) -> int:
+def pick_rephrase_span(text: str, index: textindex.TextIndex, start: int, end: int,
+                       rng=random) -> tuple[int, str] | None:
     """
-    Type a rephrased version of a sentence (or part of it), then change it back to original.
-    Only does this ONCE per sentence to avoid loops.
-    current_position is where we are in typing (may be different from end if we've typed past it).
-    Returns new position - the position we should continue typing from.
+    Pick the part of a sentence to rephrase (3-8 words).
+    Returns (char_start, text_to_rephrase), or None if the sentence is too short.
     """
-    # get the actual text that was already typed (up to current_position)
-    original_sentence = text[start:end].strip()
-    
-    if len(original_sentence) < 10:
-        return current_position  # skip very short sentences
-    
-    # get rephrased version from gemini (if AI enabled)
-    if not config.USE_AI():
-        return current_position
+    word_starts = index.words(start, end)
+    if not word_starts or len(text[word_starts[0]:end].rstrip()) < 10:
+        return None  # skip very short sentences
     
     # only rephrase a small part (5-10 words max) to keep it manageable
-    words = original_sentence.split()
-    if len(words) < 3:
-        return current_position  # too short
+    if len(word_starts) < 3:
+        return None  # too short
     
     # pick a random portion (3-8 words)
-    max_words = min(8, len(words))
-    num_words = random.randint(3, max_words)
+    max_words = min(8, len(word_starts))
+    num_words = rng.randint(3, max_words)
     
     # pick starting position
-    if len(words) <= num_words:
-        # use all words
-        selected_words = words
-        word_start_idx = 0
-    else:
-        # pick random starting point
-        word_start_idx = random.randint(0, len(words) - num_words)
-        selected_words = words[word_start_idx:word_start_idx + num_words]
-    
-    text_to_rephrase = ' '.join(selected_words)
-    
-    # find character position in original text
-    # reconstruct text up to this point
-    prefix_words = ' '.join(words[:word_start_idx])
-    if prefix_words:
-        rephrase_char_start = start + len(prefix_words) + 1  # +1 for space
+    if len(word_starts) <= num_words:
+        first = 0  # use all words
     else:
-        rephrase_char_start = start
+        first = rng.randint(0, len(word_starts) - num_words)
+    last = first + num_words
     
-    rephrased = gemini_helper.rephrase_sentence(text_to_rephrase)
+    # slice the original text (not rejoined words) so offsets stay right with any spacing
+    rephrase_char_start = word_starts[first]
+    stop = word_starts[last] if last < len(word_starts) else end
+    return rephrase_char_start, text[rephrase_char_start:stop].rstrip()
+
+def rephrase_and_type_sentence(settings: config.Settings, rng: randomness.SessionRandom, text: str,
+                               start: int, end: int, current_position: int,
+                               rephrased_sentences: set, ai: prefetch.Prefetcher | None = None) -> tuple[int, list]:
+    """
+    Type a rephrased version of a sentence (or part of it), then change it back to original.
+    Only does this ONCE per sentence to avoid loops.
+    current_position is where we are in typing (may be different from end if we've typed past it).
+    Returns (new_position, events) - the position we should continue typing from.
+    """
+    # get rephrased version from the prefetcher (if AI enabled)
+    if not settings.use_ai or ai is None:
+        return current_position, []
     
-    if rephrased == text_to_rephrase or len(rephrased) < 3:
-        return current_position  # skip if rephrasing failed or too short
+    # never blocks - if the rephrasing isn't ready yet, just skip it
+    prefetched = ai.rephrasing(start, end)
+    if prefetched is None:
+        return current_position, []
+    rephrase_char_start, text_to_rephrase, rephrased = prefetched
     
     # backspace from current position to start of rephrase section
     if current_position <= rephrase_char_start:
-        return current_position  # haven't typed this part yet
+        return current_position, []  # haven't typed this part yet
     
-    chars_to_backspace = current_position - rephrase_char_start
-    keyboard_ctrl.press_backspace(chars_to_backspace)
-    thinking_pause(300, 600)  # pause while "thinking"
+    if rephrased == text_to_rephrase or len(rephrased) < 3:
+        return current_position, []  # skip if rephrasing failed or too short
+    
+    events = backspace(settings, text[rephrase_char_start:current_position], True)
+    events.append(thinking_pause(settings, rng, 300, 600))  # pause while "thinking"
     
     # type rephrased version
-    for c in rephrased:
-        keyboard_ctrl.type_char(c)
-        base_delay()
+    events.extend(type_string(settings, rng, rephrased))
     
-    thinking_pause(500, 1200)  # longer pause - "thinking about it"
+    events.append(thinking_pause(settings, rng, 500, 1200))  # longer pause - "thinking about it"
     
     # backspace rephrased version
-    keyboard_ctrl.press_backspace(len(rephrased))
-    thinking_pause(200, 500)
+    events.extend(backspace(settings, rephrased, True))
+    events.append(thinking_pause(settings, rng, 200, 500))
     
     # type original version (just the part we rephrased)
-    for c in text_to_rephrase:
-        keyboard_ctrl.type_char(c)
-        base_delay()
+    events.extend(type_string(settings, rng, text_to_rephrase))
     
     # return position after the rephrased text
-    return rephrase_char_start + len(text_to_rephrase)
+    return rephrase_char_start + len(text_to_rephrase), events
 
-def insert_random_edit(text: str, position: int, rephrased_sentences: set) -> int:
+def insert_random_edit(settings: config.Settings, rng: randomness.SessionRandom, text: str,
+                       index: textindex.TextIndex, position: int, rephrased_sentences: set,
+                       ai: prefetch.Prefetcher | None = None) -> tuple[int, list]:
     """
     Go back and make an edit - change a word, insert something, or rephrase sentence.
-    Returns new position after edit.
+    Returns (new_position, events) after edit.
     """
     # decide: small edit (word level) or big edit (sentence rephrase)
     # use configurable probability for sentence rephrase
-    if config.should_rephrase_sentence() and position > 50:
+    if config.should_rephrase_sentence(settings, rng.rephrases) and position > 50:
         # go much further back - find a sentence to rephrase
-        lookback_start = max(0, position - random.randint(50, min(200, position)))
-        sentence_start, sentence_end = find_sentence_boundaries(text, lookback_start)
+        lookback_start = max(0, position - rng.rephrases.randint(50, min(200, position)))
+        sentence_start, sentence_end = find_sentence_boundaries(index, lookback_start)
         
         # check if this sentence was already rephrased
         sentence_key = (sentence_start, sentence_end)
@@ -186,140 +232,155 @@ def insert_random_edit(text: str, position: int, rephrased_sentences: set) -> in
             # mark as rephrased before doing it
             rephrased_sentences.add(sentence_key)
             # found a sentence to rephrase - only rephrase part of it sometimes
-            return rephrase_and_type_sentence(text, sentence_start, sentence_end, position, rephrased_sentences)
+            return rephrase_and_type_sentence(settings, rng, text, sentence_start, sentence_end, position, rephrased_sentences, ai)
     
     # regular word-level edit - go back further sometimes
-    lookback_range = random.choice([
+    lookback_range = rng.edit_actions.choice([
         (0, 20),      # nearby
         (20, 50),     # medium
         (50, 150),    # far back
     ])
-    start = max(0, position - random.randint(lookback_range[0], lookback_range[1]))
-    segment = text[start:position]
+    start = max(0, position - rng.edit_actions.randint(lookback_range[0], lookback_range[1]))
     
     # find last word boundary
-    last_space = segment.rfind(' ')
-    if last_space == -1:
-        edit_start = start
-    else:
-        edit_start = start + last_space + 1
+    edit_start = index.word_start(start, position)
+    if edit_start == start and not text[start:position].isascii():
+        # starting mid-word: don't split an accented letter or emoji sequence
+        edit_start = index.word_start(index.start, start + 1)
+        while edit_start < start:
+            edit_start = textprep.cluster_end(text, edit_start)
     
     word_to_edit = text[edit_start:position]
     
     if not word_to_edit or len(word_to_edit) < 2:
-        return position  # skip if nothing to edit
+        return position, []  # skip if nothing to edit
     
     # backspace to the start of the word
-    chars_to_backspace = position - edit_start
-    keyboard_ctrl.press_backspace(chars_to_backspace)
-    thinking_pause(100, 300)  # brief pause while "thinking"
+    at_word_start = _is_word_start(text, edit_start)
+    events = backspace(settings, word_to_edit, at_word_start)
+    events.append(thinking_pause(settings, rng, 100, 300))  # brief pause while "thinking"
     
     # decide: change word or insert something
-    action = random.choice(['change', 'insert', 'improve'])
+    action = rng.edit_actions.choice(['change', 'insert', 'improve'])
     
     if action == 'change' and len(word_to_edit) > 3:
-        # try to get similar words from gemini (if AI enabled)
+        # try to get prefetched similar words (if AI enabled and ready)
         similar_words = []
-        if config.USE_AI():
-            similar_words = gemini_helper.get_similar_words(word_to_edit, count=3)
+        if settings.use_ai and ai is not None:
+            similar_words = ai.similar_words(word_to_edit) or []
         
-        if similar_words and random.random() < 0.6:
+        if similar_words and rng.edit_actions.random() < 0.6:
             # use gemini suggestion
-            new_word = random.choice(similar_words)
+            new_word = rng.edit_actions.choice(similar_words)
         else:
             # fallback to typo-based change
             new_word = word_to_edit
-            if random.random() < 0.5:
-                idx = random.randint(0, len(new_word) - 1)
-                neighbor = config.get_neighbor_key(new_word[idx])
+            if rng.edit_actions.random() < 0.5:
+                idx = rng.edit_actions.randint(0, len(new_word) - 1)
+                neighbor = config.get_neighbor_key(new_word[idx], rng.edit_actions, settings.keyboard_layout)
                 if neighbor:
                     new_word = new_word[:idx] + neighbor + new_word[idx+1:]
         
         # type the changed word
-        for c in new_word:
-            keyboard_ctrl.type_char(c)
-            base_delay()
+        events.extend(type_string(settings, rng, new_word))
         
         # then backspace and fix it
-        thinking_pause(200, 500)
-        keyboard_ctrl.press_backspace(len(new_word))
-        thinking_pause(100, 300)
+        events.append(thinking_pause(settings, rng, 200, 500))
+        events.extend(backspace(settings, new_word, at_word_start))
+        events.append(thinking_pause(settings, rng, 100, 300))
         
         # retype original correctly
-        for c in word_to_edit:
-            keyboard_ctrl.type_char(c)
-            base_delay()
+        events.extend(type_string(settings, rng, word_to_edit))
         
-        return edit_start + len(word_to_edit)
+        return edit_start + len(word_to_edit), events
     
     elif action == 'insert':
-        # get varied insertion words from gemini (if AI enabled)
+        # get varied insertion words from the prefetcher (if AI enabled and ready)
         insertions_list = []
-        if config.USE_AI():
-            insertions_list = gemini_helper.get_insertion_words()
+        if settings.use_ai and ai is not None:
+            insertions_list = ai.insertion_words() or []
         if not insertions_list:
             # fallback
             insertions_list = [' actually', ' really', ' kind of', ' sort of', ' I mean', ' well', ' like', ' you know', ' perhaps', ' maybe']
         
-        chosen = random.choice(insertions_list)
+        chosen = rng.edit_actions.choice(insertions_list)
         insertion = ' ' + chosen if not chosen.startswith(' ') else chosen
         
-        for c in insertion:
-            keyboard_ctrl.type_char(c)
-            base_delay()
+        events.extend(type_string(settings, rng, insertion))
         
-        thinking_pause(300, 700)
+        events.append(thinking_pause(settings, rng, 300, 700))
         
         # delete the insertion
-        keyboard_ctrl.press_backspace(len(insertion))
-        thinking_pause(100, 300)
+        events.extend(backspace(settings, insertion, at_word_start))
+        events.append(thinking_pause(settings, rng, 100, 300))
         
         # retype original word
-        for c in word_to_edit:
-            keyboard_ctrl.type_char(c)
-            base_delay()
+        events.extend(type_string(settings, rng, word_to_edit))
         
-        return edit_start + len(word_to_edit)
+        return edit_start + len(word_to_edit), events
     
     else:  # improve
         # type word, then improve it
-        for c in word_to_edit:
-            keyboard_ctrl.type_char(c)
-            base_delay()
+        events.extend(type_string(settings, rng, word_to_edit))
         
-        thinking_pause(200, 600)
+        events.append(thinking_pause(settings, rng, 200, 600))
         
         # maybe add something after
-        if random.random() < 0.3:
+        if rng.edit_actions.random() < 0.3:
             additions = ['er', 'ly', 'ing']
-            addition = random.choice(additions)
-            for c in addition:
-                keyboard_ctrl.type_char(c)
-                base_delay()
+            addition = rng.edit_actions.choice(additions)
+            events.extend(type_string(settings, rng, addition))
             
-            thinking_pause(200, 500)
-            keyboard_ctrl.press_backspace(len(addition))
-            thinking_pause(100, 300)
+            events.append(thinking_pause(settings, rng, 200, 500))
+            events.extend(backspace(settings, addition))
+            events.append(thinking_pause(settings, rng, 100, 300))
         
-        return edit_start + len(word_to_edit)
+        return edit_start + len(word_to_edit), events
 
-def type_text_realistic(text: str):
+def iter_plan(text: str | StreamingText, settings: config.Settings | None = None, ai: prefetch.Prefetcher | None = None,
+              rng: randomness.SessionRandom | None = None):
     """
-    Main function: type text with realistic human behavior.
+    Planner: turn text into keystroke plan events with realistic human behavior.
+    A generator, so planning can run just ahead of the executor. AI suggestions
+    come from the prefetcher and never block - misses use the local fallbacks.
+    All randomness comes from rng, so a seeded run plans the same keystrokes
+    (as long as no AI suggestions are involved - those depend on network timing).
     """
+    published = config.get_settings()
+    if settings is None:
+        settings = published
+    if rng is None:
+        rng = randomness.SessionRandom()
+    typo_draw = rng.typos.random
+    delay_draw = rng.delays.uniform
+    release = getattr(text, 'release', None)  # streaming.StreamingText: drop text far behind
+    index = ai.index if ai is not None else textindex.index_of(text)
+    # non-ascii text may have multi-char grapheme clusters (see textprep)
+    clusters = not isinstance(text, str) or not text.isascii()
+    
     i = 0
     last_word_end = 0
     # track which sentences have been rephrased to avoid loops
     rephrased_sentences = set()
     
-    while i < len(text) and not keyboard_ctrl.is_stopped() and not shortcuts.is_stopped():
+    while i < len(text):
         char = text[i]
         
+        if char in ' \n\t':
+            if config.get_settings() is not published:
+                # pick up a snapshot published mid-run (checked once per word)
+                settings = published = config.get_settings()
+            if ai is not None:
+                ai.advance(i)  # keep suggestions coming ahead of the cursor
+            if release is not None:
+                release(i)
+        
         # check if we should make an edit (after finishing a word)
         if char in ' \n\t' and i > last_word_end + 3:
-            if config.should_edit() and i < len(text) - 5:
+            if config.should_edit(settings, rng.edits) and i < len(text) - 5:
                 # go back and edit something
-                new_i = insert_random_edit(text, i, rephrased_sentences)
+                new_i, events = insert_random_edit(settings, rng, text, index, i, rephrased_sentences, ai)
+                yield from events
                 # if we moved backward (did an edit), continue from there
                 if new_i < i:
                     i = new_i
@@ -334,35 +395,158 @@ def type_text_realistic(text: str):
                     last_word_end = i
                     continue
         
-        # simulate typo
-        typed_char, was_typo = simulate_typo(char)
-        keyboard_ctrl.type_char(typed_char)
-        
-        if was_typo:
-            # brief pause, then correct
-            base_delay()
-            thinking_pause(150, 400)
-            backspace_and_fix(char)
-            i += 1
-            if char in ' \n\t':
-                last_word_end = i
-            continue
+        if clusters and text[i + 1:i + 2] >= '\u0300':
+            end = textprep.cluster_end(text, i)
+            if end > i + 1:
+                # an accented letter or emoji sequence is one key - no typos in it
+                yield (TYPE, text[i:end])
+                yield (SLEEP, delay_draw(settings.base_delay_min, settings.base_delay_max))
+                i = end
+                continue
         
-        # normal typing delay
-        base_delay()
+        # typo or not (inlined, it runs for almost every char; make_typo has the rest)
+        if typo_draw() < settings.typo_probability:
+            events, was_typo = make_typo(settings, rng, char)
+            yield from events
+        else:
+            was_typo = False
+            yield (TYPE, char)
+            yield (SLEEP, delay_draw(settings.base_delay_min, settings.base_delay_max))
         
-        # special pauses for punctuation
-        if char == '.' or char == '!' or char == '?':
-            # sentence end - longer pause
-            thinking_pause(config.SENTENCE_PAUSE_MIN(), config.SENTENCE_PAUSE_MAX())
-        elif char == ',' or char == ';':
-            # comma/semicolon pause
-            thinking_pause(config.COMMA_PAUSE_MIN(), config.COMMA_PAUSE_MAX())
-        elif char == '\n':
-            # paragraph break - even longer pause
-            thinking_pause(config.SENTENCE_PAUSE_MIN() * 2, config.SENTENCE_PAUSE_MAX() * 2)
+        if not was_typo:
+            # special pauses for punctuation
+            if char == '.' or char == '!' or char == '?':
+                # sentence end - longer pause
+                yield thinking_pause(settings, rng, settings.sentence_pause_min, settings.sentence_pause_max)
+            elif char == ',' or char == ';':
+                # comma/semicolon pause
+                yield thinking_pause(settings, rng, settings.comma_pause_min, settings.comma_pause_max)
+            elif char == '\n':
+                # paragraph break - even longer pause
+                yield thinking_pause(settings, rng, settings.sentence_pause_min * 2, settings.sentence_pause_max * 2)
         
         i += 1
         if char in ' \n\t':
             last_word_end = i
+            yield (PROGRESS, i)
+    
+    yield (PROGRESS, len(text))
 
+def execute_plan(plan: Iterable[tuple], settings: config.Settings | None = None,
+                 token: shortcuts.ControlToken | None = None,
+                 sink: sinks.Sink | None = None, clock=None,
+                 progress: progress_mod.Progress | None = None) -> scheduler.DeadlineScheduler:
+    """
+    Executor: replay a keystroke plan into an output sink.
+    Only emits keys and sleeps - no decisions are made here.
+    Returns the scheduler so callers can report its timing jitter
+    (pass a scheduler.VirtualClock as clock to simulate the delays instead).
+    Position and keystroke counts go to `progress` at every word end.
+    """
+    if settings is None:
+        settings = config.get_settings()
+    if token is None:
+        token = shortcuts.get_token()
+    if sink is None:
+        sink = keyboard_ctrl.get_sink()
+    
+    if clock is None:
+        clock = scheduler.DeadlineScheduler(token, spin_us=settings.timer_spin_us)
+    timer = clock
+    tracer = trace.get_tracer()
+    if tracer is not None:
+        # only wrapped while tracing, so the loop below costs the same when it's off
+        sink = trace.TracedSink(sink, tracer)
+        timer = trace.TracedClock(clock, tracer)
+    backspace_interval = settings.backspace_delay_ms / 1000.0
+    burst_interval = 1.0 / settings.backspace_burst_rate if settings.backspace_burst_rate > 0 else 0.0
+    # delays too short to sleep on (after the speed multiplier) add up until they reach
+    # this floor, and the keys typed in between go out as one burst
+    floor = settings.coalesce_below_ms
+    pending = ''  # text typed since the last sleep, sent as one burst
+    owed = 0.0  # ms of delay not slept yet
+    keys = 0
+    try:
+        for op, arg in plan:
+            if token.is_stopped():
+                break
+            
+            if op == TYPE:
+                pending += arg
+                keys += len(arg)
+            elif op == SLEEP:
+                owed += arg
+                if owed < floor * token.speed:
+                    continue
+                if pending:
+                    sink.type_text(pending)
+                    pending = ''
+                # batching sinks send what they have before every delay
+                sink.flush()
+                # the scheduler applies the speed multiplier and handles pause/stop
+                timer.sleep(owed / 1000.0)
+                owed = 0.0
+                if token.is_paused():
+                    token.wait_resumed()
+                    timer.resync()  # don't rush to catch up after a pause
+            elif op == PROGRESS:
+                if progress is not None:
+                    progress.update(arg, keys)
+            else:
+                if pending:
+                    sink.type_text(pending)
+                    pending = ''
+                paced = 0.0
+                if op == BACKSPACE:
+                    paced = backspace_interval
+                    sink.backspace(arg, paced, token)
+                elif op == BULK_BACKSPACE:
+                    paced = burst_interval
+                    sink.backspace(arg, paced, token)
+                elif op == WORD_BACKSPACE:
+                    paced = burst_interval
+                    sink.word_backspace(arg, paced, token)
+                keys += arg
+                if paced:
+                    # the sink waited between the keys - that isn't emit time to take
+                    # out of the next delay, so the pause after a deletion keeps its length
+                    timer.resync()
+        else:
+            # the end of a burst still takes its time
+            if pending:
+                sink.type_text(pending)
+            if owed:
+                sink.flush()
+                timer.sleep(owed / 1000.0)
+    finally:
+        sink.flush()
+    
+    return clock
+
+def type_text_realistic(text: str | StreamingText, settings: config.Settings | None = None,
+                        sink: sinks.Sink | None = None,
+                        rng: randomness.SessionRandom | None = None,
+                        progress: progress_mod.Progress | None = None) -> scheduler.DeadlineScheduler:
+    """
+    Main function: type text with realistic human behavior.
+    Pass a seeded rng to make the run reproducible, or a StreamingText to
+    start typing while the input is still being read (its chunks should
+    already have gone through textprep.prepare_chunks).
+    """
+    if settings is None:
+        settings = config.get_settings()
+    if isinstance(text, str):
+        text = textprep.prepare_settings(text, settings)
+    if rng is None:
+        rng = randomness.SessionRandom()
+    
+    # AI suggestions are requested in the background, ahead of the cursor
+    ai = None
+    if settings.use_ai:
+        from . import prefetch
+        ai = prefetch.Prefetcher(text, pick_rephrase_span, rng=rng.spans)
+    try:
+        return execute_plan(iter_plan(text, settings, ai, rng), settings, sink=sink, progress=progress)
+    finally:
+        if ai is not None:
+            ai.close()
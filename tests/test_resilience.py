@@ -0,0 +1,153 @@
+"""
+Guard / circuit breaker behavior against a fake clock (no network).
+
+    python -m unittest discover tests
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+import unittest.mock
+from typesim import resilience
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class Unavailable(Exception):
+    code = 503
+
+def make_guard(clock: FakeClock, rate: float = 0.0, burst: int = 1) -> resilience.Guard:
+    return resilience.Guard(
+        resilience.TokenBucket(rate=rate, burst=burst, clock=clock),
+        resilience.CircuitBreaker(threshold=1, cooldown=10.0, clock=clock),
+        max_retries=0,
+        deadline=0.5,
+    )
+
+def fail():
+    raise Unavailable("down")
+
+class TrialTest(unittest.TestCase):
+    def test_rate_limited_trial_is_not_taken(self):
+        clock = FakeClock()
+        guard = make_guard(clock, rate=0.01, burst=1)
+        with self.assertRaises(Unavailable):
+            guard.call(fail)  # uses the only slot and opens the circuit
+        clock.now = 10.5  # cooldown over, but the next slot is ~90s away
+        with self.assertRaises(resilience.RateLimitedError):
+            guard.call(lambda: "ok")
+        self.assertFalse(guard.breaker._trial)
+        guard.bucket.rate = 0  # slots free again
+        self.assertEqual(guard.call(lambda: "ok"), "ok")
+
+    def test_interrupted_trial_is_released(self):
+        clock = FakeClock()
+        guard = make_guard(clock)
+        with self.assertRaises(Unavailable):
+            guard.call(fail)
+        clock.now = 11.0
+
+        def interrupted():
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            guard.call(interrupted)
+        self.assertFalse(guard.breaker._trial)
+        self.assertEqual(guard.call(lambda: "ok"), "ok")
+
+    def test_cancelled_async_trial_is_released(self):
+        clock = FakeClock()
+        guard = make_guard(clock)
+        with self.assertRaises(Unavailable):
+            guard.call(fail)
+        clock.now = 11.0
+
+        async def hang():
+            await asyncio.sleep(60)
+
+        async def ok():
+            return "ok"
+
+        async def run():
+            task = asyncio.ensure_future(guard.call_async(hang))
+            await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return await guard.call_async(ok)
+
+        self.assertEqual(asyncio.run(run()), "ok")
+        self.assertFalse(guard.breaker.is_open)
+
+    def test_failed_trial_reopens(self):
+        clock = FakeClock()
+        guard = make_guard(clock)
+        with self.assertRaises(Unavailable):
+            guard.call(fail)
+        clock.now = 11.0
+        with self.assertRaises(Unavailable):
+            guard.call(fail)
+        with self.assertRaises(resilience.CircuitOpenError):
+            guard.call(lambda: "ok")
+
+class StopTest(unittest.TestCase):
+    def stop_soon(self) -> threading.Event:
+        stop = threading.Event()
+        timer = threading.Timer(0.05, stop.set)
+        timer.start()
+        self.addCleanup(timer.cancel)
+        return stop
+
+    def test_stop_ends_wait_for_slot(self):
+        guard = resilience.Guard(
+            resilience.TokenBucket(rate=0.1, burst=1),
+            resilience.CircuitBreaker(),
+            deadline=30.0,
+        )
+        guard.call(lambda: "ok")  # uses the only slot, the next is 10s away
+        started = time.monotonic()
+        with resilience.stop_on(self.stop_soon()):
+            with self.assertRaises(resilience.StoppedError):
+                guard.call(lambda: "ok")
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertGreaterEqual(guard.bucket._tokens, -0.01)  # the slot was given back
+
+    def test_stop_ends_backoff(self):
+        guard = resilience.Guard(
+            resilience.TokenBucket(rate=0, burst=1),
+            resilience.CircuitBreaker(threshold=10),
+            max_retries=5,
+            backoff_base=20.0,
+            backoff_max=20.0,
+            deadline=60.0,
+        )
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            raise Unavailable("down")
+
+        with unittest.mock.patch("random.uniform", return_value=20.0):
+            started = time.monotonic()
+            with resilience.stop_on(self.stop_soon()):
+                with self.assertRaises(resilience.StoppedError):
+                    guard.call(flaky)
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(len(calls), 1)
+
+    def test_stop_only_affects_its_thread(self):
+        guard = make_guard(FakeClock())
+        stop = threading.Event()
+        stop.set()
+        with resilience.stop_on(stop):
+            with self.assertRaises(resilience.StoppedError):
+                guard.call(lambda: "ok")
+        self.assertEqual(guard.call(lambda: "ok"), "ok")
+
+if __name__ == "__main__":
+    unittest.main()